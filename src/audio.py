@@ -1,7 +1,7 @@
 """
 audio.py
 Description:
-    Provides functionality for loading, playing, and pausing music.
+    Provides functionality for loading, playing, pausing, and preloading music.
 Programmers:
     Steve Gan
     Sean Hammell
@@ -24,31 +24,74 @@ Error Conditions:
     play_music, pause_music, and unpause_music will raise an exception if there is not
         a valid music file loaded.
 Side Effects:
-    None.
+    read_music keeps a track's bytes in memory for the life of the process.
 Invariants:
     There can never be more than a single music file loaded at a time.
+    current_track is the file most recently loaded with set_music.
 Known Faults:
     None.
 """
 
+import io
+import os
+
 import pygame
 
+from engine import engine_instance  # Import the engine singleton instance.
+
 mus_vol = .05
 
+MUSIC_TRACKS = ("assets/music.wav",)  # Every music track the game plays.
+
+current_track = None  # Track loaded into the mixer, if any.
+_track_bytes = {}     # Map of normalized track paths to their preloaded file contents.
+
+
+def _source(file):
+    """
+    Returns something pygame.mixer.music can load file from: its preloaded bytes, or the path.
+    """
+    data = _track_bytes.get(os.path.normpath(file))
+    return io.BytesIO(data) if data is not None else file
+
+
+def read_music(file):
+    """
+    Reads a track into memory now, so loading it later does no disk I/O. Safe to call from a worker thread.
+    """
+    key = os.path.normpath(file)
+    if engine_instance.headless or key in _track_bytes:
+        return
+
+    with open(file, "rb") as track:
+        _track_bytes[key] = track.read()
+
 
 def set_music(file):
     """
     Sets the music.
     """
-    # Load the music file.
-    pygame.mixer.music.load(file)
+    # Headless engines have no use for music.
+    if engine_instance.headless:
+        return
+
+    # The track is already loaded, so there is nothing to read.
+    global current_track
+    if file == current_track:
+        return
+
+    # Load the music file, from memory if it was preloaded.
+    pygame.mixer.music.load(_source(file), os.path.splitext(file)[1][1:])
     pygame.mixer.music.set_volume(mus_vol)
+    current_track = file
 
 
 def play_music():
     """
     Begins playing the music.
     """
+    if engine_instance.headless:
+        return
     pygame.mixer.music.play(-1)
 
 
@@ -56,6 +99,8 @@ def pause_music():
     """
     Pauses the music.
     """
+    if engine_instance.headless:
+        return
     pygame.mixer.music.pause()
 
 
@@ -63,6 +108,8 @@ def unpause_music():
     """
     Unpauses the music.
     """
+    if engine_instance.headless:
+        return
     pygame.mixer.music.unpause()
 
 
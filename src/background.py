@@ -0,0 +1,91 @@
+"""
+background.py
+Description:
+    Draws a level background as a horizontally tiled band that scrolls with the level at a parallax ratio,
+    blitting only the part of the band that is on screen.
+Created:
+    Oct 17, 2026
+Preconditions:
+    The Pygame library is initialized and the display mode has been set.
+    The background image file is a valid image file.
+Postconditions:
+    Every frame covers the whole screen with at most two blits (for a band at least as wide as the screen),
+    however far the level has scrolled.
+Error Conditions:
+    __init__ raises an exception if the image file is invalid or missing.
+        When the engine is headless the exception is raised on first draw instead.
+Side Effects:
+    Allocates one band surface per layer when it is created, or on first draw when the engine is headless.
+Invariants:
+    The band is in the display's pixel format, so blits never convert pixels.
+Known Faults:
+    Only the top SCREEN_HEIGHT rows of the image are shown; the background does not follow the camera vertically.
+"""
+
+import pygame
+
+from engine import engine_instance, SCREEN_WIDTH, SCREEN_HEIGHT
+from image import texture_cache
+from profiler import frame_counters
+
+BACKGROUND_PARALLAX = 0.25  # Pixels the background scrolls per pixel the level scrolls.
+
+
+class BackgroundLayer:
+    """
+    BackgroundLayer tiles an image across the screen and scrolls it at a fraction of the level's speed.
+    """
+    def __init__(self, file, parallax=BACKGROUND_PARALLAX, mirror=True):
+        """
+        Initializes a BackgroundLayer for an image file. parallax is the fraction of the level's scroll the
+        background moves by. A mirrored layer alternates the image with its reflection, so tiles meet seamlessly
+        even when the image's left and right edges don't match.
+        """
+        self._file = file
+        self.parallax = parallax
+        self._mirror = mirror
+
+        # Build the band now rather than on the first frame. Headless engines never draw, so they wait until asked.
+        self._band = None if engine_instance.headless else self._build()
+
+    def _build(self):
+        """
+        Builds the band: the top of the image, repeated down to the screen height, followed by its mirror image.
+        """
+        image = texture_cache.load(self._file)
+        width, height = image.get_width(), min(image.get_height(), SCREEN_HEIGHT)
+        tile = pygame.Surface((width, SCREEN_HEIGHT)).convert()
+        for y in range(0, SCREEN_HEIGHT, height): # repeat short images downwards
+            tile.blit(image, (0, y), pygame.Rect(0, 0, width, height))
+
+        if not self._mirror:
+            return tile
+        band = pygame.Surface((width * 2, SCREEN_HEIGHT)).convert()
+        band.blit(tile, (0, 0))
+        band.blit(pygame.transform.flip(tile, True, False), (width, 0))
+        return band
+
+    def period(self):
+        """
+        Returns the number of pixels the background scrolls before it repeats.
+        """
+        if self._band is None:
+            self._band = self._build()
+        return self._band.get_width()
+
+    def draw(self, scroll_x, target=None):
+        """
+        Draws the background for a level scrolled scroll_x pixels, covering the screen or the target surface.
+        """
+        period = self.period()
+        if target is None:
+            target = engine_instance.screen
+
+        x = int(scroll_x * self.parallax) % period # where the screen's left edge falls in the band
+        drawn = 0
+        while drawn < SCREEN_WIDTH: # once per band the screen spans
+            width = min(period - x, SCREEN_WIDTH - drawn)
+            target.blit(self._band, (drawn, 0), pygame.Rect(x, 0, width, SCREEN_HEIGHT))
+            frame_counters["blits"] += 1
+            drawn += width
+            x = 0
@@ -0,0 +1,358 @@
+"""
+benchmark.py
+Description:
+    Micro-benchmarks for the per-frame hot paths: level construction, collision queries, cube movement,
+    level drawing, background drawing, image blitting, menu drawing, and a full GameState update. Results
+    are printed and written as JSON.
+Created:
+    Oct 17, 2026
+Preconditions:
+    - Must be run from the src directory so asset paths resolve.
+    - Tile and sprite assets for every level are present.
+Postconditions:
+    - Each benchmark reports ops/sec and per-call latency percentiles.
+    - Benchmarks of cached or indexed paths also report the counters of the structures they exercised.
+    - The results are written to the --output file as JSON.
+    - With --compare, exits with status 1 if any benchmark regressed past --tolerance.
+Error Conditions:
+    - Raises an exception if an asset a benchmark draws is missing.
+Side Effects:
+    - Sets SHAPE_SPRINT_HEADLESS=1 before the engine is imported, so drawing goes to an off-screen surface.
+    - Writes the --output file.
+Invariants:
+    - Only the benchmarked call is timed; setup between calls is excluded.
+Known Faults:
+    None.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ["SHAPE_SPRINT_HEADLESS"] = "1"  # Must be set before the engine is imported.
+
+import pygame
+
+from engine import engine_instance        # Imports the engine singleton instance.
+from background import BackgroundLayer    # Imports the tiled background layer.
+from collision import NUMPY_AVAILABLE     # Imports whether the NumPy collision backend can be used.
+from image import Image, texture_cache    # Imports the Image class and the shared texture cache.
+from level import Cube, Level, levels, GROUND_LEVEL  # Imports the level classes and specifications.
+from level_format import load_level       # Imports the compiled level loader.
+from object import TILE_SIZE              # Imports the tile size.
+from sound_effect import sound_bank       # Imports the shared sound bank.
+from state import BACKGROUNDS, GameState, OpeningMenuState  # Imports the game and opening menu states and level backgrounds.
+from text_cache import text_cache         # Imports the shared text cache.
+
+BENCH_LEVEL = 4  # Level used by the benchmarks that need a single level.
+
+
+def percentile(samples, fraction):
+    """
+    Returns the sample at the given fraction of a sorted list.
+    """
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def measure(name, op, iterations, between=None, warmup=10):
+    """
+    Times op iterations times, calling between (untimed) before each call. Returns a result dict.
+    """
+    for _ in range(warmup):
+        if between is not None:
+            between()
+        op()
+
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        if between is not None:
+            between()
+        start = clock()
+        op()
+        samples.append(clock() - start)
+
+    samples.sort()
+    total = sum(samples)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "ops_per_sec": iterations / (total / 1e9) if total else float("inf"),
+        "mean_us": total / iterations / 1e3,
+        "p50_us": percentile(samples, 0.50) / 1e3,
+        "p90_us": percentile(samples, 0.90) / 1e3,
+        "p99_us": percentile(samples, 0.99) / 1e3,
+        "max_us": samples[-1] / 1e3,
+    }
+
+
+class LevelRunner:
+    """
+    Keeps a level and cube scrolling across the level, restarting once the camera passes the end.
+    """
+    def __init__(self, specs, collisions=None):
+        """
+        Initializes a LevelRunner for a level specification, using the given collision backend.
+        """
+        self._specs = specs
+        self._collisions = collisions
+        self._end = self._specs["ground"][1] * TILE_SIZE
+        self.reset()
+
+    def reset(self):
+        """
+        Rebuilds the level and cube at the start of the level.
+        """
+        self.level = Level(self._specs, [0, GROUND_LEVEL], collisions=self._collisions)
+        self.cube = Cube()
+
+    def step(self):
+        """
+        Scrolls the level one step and puts the cube back on its start row.
+        """
+        if self.level._camera.offset_x > self._end:
+            self.reset()
+        self.level.scroll(0)
+        self.cube._rect.topleft = (4 * TILE_SIZE, GROUND_LEVEL * TILE_SIZE)
+
+
+def bench_level_init(iterations):
+    """
+    Benchmarks Level construction for every level, from its specification and from its compiled file.
+    """
+    results = []
+    for level_id in levels:
+        specs = levels[level_id]
+        compiled = load_level(level_id)
+        results.append(measure(f"Level.__init__[{level_id}]", lambda: Level(specs, [0, GROUND_LEVEL]), iterations))
+        result = measure(f"Level.__init__[{level_id}, lvl]", lambda: Level(compiled, [0, GROUND_LEVEL]), iterations)
+        store = Level(compiled, [0, GROUND_LEVEL])._store
+        result["counters"] = {"entities": len(store), "store_bytes": store.nbytes()}
+        results.append(result)
+    return results
+
+
+def bench_get_collisions(iterations):
+    """
+    Benchmarks Level.get_collisions as the camera moves through the level.
+    """
+    runner = LevelRunner(levels[BENCH_LEVEL])
+    result = measure("Level.get_collisions", lambda: runner.level.get_collisions(runner.cube), iterations, runner.step)
+    result["counters"] = runner.level.collision_stats()
+    return [result]
+
+
+def synthetic_level(columns, seed=0):
+    """
+    Returns a level specification columns tiles long, with a random obstacle every few columns.
+    """
+    rng = random.Random(seed)
+    specs = {"id": BENCH_LEVEL, "ground": (-10, columns), "platforms": [], "checkpoints": [], "spikes": [],
+             "invertGravity": [], "speed": [], "end": (columns - 20, GROUND_LEVEL - 1)}
+    for x in range(20, columns - 40, 6):
+        width = rng.randint(1, 4)
+        if rng.random() < 0.5:
+            specs["spikes"].append((x, x + width, GROUND_LEVEL))
+        else:
+            row = GROUND_LEVEL - rng.choice((2, 4, 6, 8))
+            specs["platforms"].append((x, x + width, row))
+            if rng.random() < 0.3:
+                specs["spikes"].append((x, x + 1, row - 1))
+    return specs
+
+
+def bench_collision_backends(iterations):
+    """
+    Benchmarks Level.get_collisions with each collision backend, on the benchmark level and on a synthetic
+    10,000-column level.
+    """
+    cases = [(f"level{BENCH_LEVEL}", levels[BENCH_LEVEL]), ("10k", synthetic_level(10000))]
+    backends = ["columns"] + (["numpy"] if NUMPY_AVAILABLE else [])
+    results = []
+    for label, specs in cases:
+        for backend in backends:
+            runner = LevelRunner(specs, backend)
+            result = measure(f"get_collisions[{backend}, {label}]", lambda: runner.level.get_collisions(runner.cube),
+                             iterations, runner.step)
+            result["counters"] = runner.level.collision_stats()
+            results.append(result)
+    return results
+
+
+def bench_cube_move(iterations):
+    """
+    Benchmarks Cube.move on the ground, including the camera scroll it performs.
+    """
+    runner = LevelRunner(levels[BENCH_LEVEL])
+
+    def between():
+        if runner.level._camera.offset_x > runner._end:
+            runner.reset()
+        runner.cube._rect.topleft = (4 * TILE_SIZE, GROUND_LEVEL * TILE_SIZE)
+
+    return [measure("Cube.move", lambda: runner.cube.move(0, 1, runner.level), iterations, between)]
+
+
+def bench_level_draw(iterations):
+    """
+    Benchmarks Level.draw as the camera moves through the level.
+    """
+    runner = LevelRunner(levels[BENCH_LEVEL])
+    result = measure("Level.draw", lambda: runner.level.draw(), iterations, runner.step)
+    result["counters"] = runner.level._chunks.stats()
+    return [result]
+
+
+def bench_background_draw(iterations):
+    """
+    Benchmarks BackgroundLayer.draw at random scroll positions up to a million pixels into a level.
+    """
+    layer = BackgroundLayer(BACKGROUNDS[BENCH_LEVEL])
+    layer.period() # build the band outside the timings
+    rng = random.Random(0)
+    scroll = [0]
+
+    def between():
+        scroll[0] = rng.randrange(1000000)
+
+    return [measure("BackgroundLayer.draw", lambda: layer.draw(scroll[0]), iterations, between)]
+
+
+def bench_image_blit(iterations):
+    """
+    Benchmarks Image.blit for a tile at random on-screen positions.
+    """
+    image = Image("assets/ground.png")
+    rng = random.Random(0)
+    position = [0, 0]
+
+    def between():
+        position[0] = rng.randrange(-TILE_SIZE, 1600)
+        position[1] = rng.randrange(-TILE_SIZE, 800)
+
+    return [measure("Image.blit", lambda: image.blit(position[0], position[1]), iterations, between)]
+
+
+def bench_menu_draw(iterations):
+    """
+    Benchmarks drawing the opening menu, moving the selection before each draw.
+    """
+    menu = OpeningMenuState(0)
+
+    def between():
+        menu.selected_option = (menu.selected_option + 1) % len(menu.options)
+
+    result = measure("OpeningMenuState.draw", menu.draw, iterations, between)
+    result["counters"] = text_cache.stats()
+    return [result]
+
+
+def bench_game_update(iterations):
+    """
+    Benchmarks a full GameState.update step, restarting the level whenever the run ends.
+    """
+    holder = []
+
+    def between():
+        if not holder or engine_instance.state is not holder[0]:
+            holder[:] = [GameState(BENCH_LEVEL)]
+            engine_instance.state = holder[0]
+
+    return [measure("GameState.update", lambda: holder[0].update(), iterations, between)]
+
+
+BENCHMARKS = {
+    "level_init": bench_level_init,
+    "get_collisions": bench_get_collisions,
+    "collision_backends": bench_collision_backends,
+    "cube_move": bench_cube_move,
+    "level_draw": bench_level_draw,
+    "background_draw": bench_background_draw,
+    "image_blit": bench_image_blit,
+    "menu_draw": bench_menu_draw,
+    "game_update": bench_game_update,
+}
+
+
+def format_counters(counters):
+    """
+    Returns a counters dict as one line of name=value pairs.
+    """
+    return " ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}" for name, value in counters.items())
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Prints the change against a previous results file. Returns the names of benchmarks that regressed.
+    """
+    with open(baseline_path) as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+    regressions = []
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None:
+            continue
+        change = result["p50_us"] / old["p50_us"] - 1 if old["p50_us"] else 0
+        print(f"  {result['name']:<32} p50 {old['p50_us']:>10.2f} -> {result['p50_us']:>10.2f} us ({change:+.1%})")
+        if change > tolerance:
+            regressions.append(result["name"])
+    return regressions
+
+
+# Main function.
+def main():
+    """
+    Runs the selected benchmarks, prints a table, and writes the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Shape Sprint hot paths.")
+    parser.add_argument("--iterations", type=int, default=1000, help="timed calls per benchmark")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown before failing --compare")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        # Level construction is far slower than the per-frame paths, so it gets fewer iterations.
+        iterations = max(1, args.iterations // 20) if name == "level_init" else args.iterations
+        results.extend(BENCHMARKS[name](iterations))
+
+    print(f"{'benchmark':<32} {'ops/sec':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10}")
+    for result in results:
+        print(f"{result['name']:<32} {result['ops_per_sec']:>12.0f} {result['p50_us']:>10.2f} "
+              f"{result['p90_us']:>10.2f} {result['p99_us']:>10.2f}")
+
+    # Counters show whether the caches and indexes behind the timings are doing their job.
+    caches = {"texture_cache": texture_cache.stats(), "sound_bank": sound_bank.stats()}
+    for result in results:
+        if "counters" in result:
+            print(f"  {result['name']:<30} {format_counters(result['counters'])}")
+    for name, counters in caches.items():
+        print(f"  {name:<30} {format_counters(counters)}")
+
+    with open(args.output, "w") as file:
+        json.dump({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "results": results,
+            "caches": caches,
+        }, file, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("regressed: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+# Main entry point.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+chunk_cache.py
+Description:
+    Pre-renders a level into fixed-width chunk surfaces so a frame only needs a few large blits.
+Created:
+    Oct 17, 2026
+Preconditions:
+    The Pygame library is initialized and the display mode has been set.
+    The objects passed to the constructor keep fixed world positions and appearances.
+    If the object list is streamed, every object overlapping a chunk is in it when that chunk is built.
+Postconditions:
+    Chunks near the visible area are built on demand and drawn to the screen.
+Error Conditions:
+    None.
+Side Effects:
+    Allocates one surface per resident chunk.
+Invariants:
+    No more than capacity chunks are resident at a time.
+    Objects are drawn into a chunk in the order they were given.
+Known Faults:
+    None.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+from engine import engine_instance, SCREEN_WIDTH
+from object import TILE_SIZE
+from profiler import frame_counters
+
+CHUNK_TILES = 16     # Width of a chunk in tiles.
+CHUNK_CAPACITY = 4   # Most chunks kept resident at once.
+
+
+class ChunkCache:
+    """
+    ChunkCache bakes static level objects into chunk surfaces and evicts them once they scroll away.
+    """
+    def __init__(self, objects, chunk_tiles=CHUNK_TILES, capacity=CHUNK_CAPACITY, bounds=None):
+        """
+        Initializes a ChunkCache for a list of objects in draw order. bounds is the (left, top, right, bottom)
+        of the whole level in pixels, for when objects only holds the objects that are currently live.
+        """
+        self._objects = objects                           # Objects to bake, in draw order.
+        self._chunk_width = chunk_tiles * TILE_SIZE       # Width of a chunk in pixels.
+        self._capacity = capacity                         # Most chunks kept resident at once.
+        self._chunks = OrderedDict()                      # Map of chunk index to surface, least recently used first.
+
+        # Every chunk spans the full height of the level.
+        if bounds is None:
+            bounds = (min((obj._rect.left for obj in objects), default=0), min((obj._rect.top for obj in objects), default=0),
+                      max((obj._rect.right for obj in objects), default=0), max((obj._rect.bottom for obj in objects), default=0))
+        self._left, self._top, self._right, bottom = bounds
+        self._height = bottom - self._top
+
+        # Track how well the cache is doing.
+        self.builds = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def _build(self, index):
+        """
+        Renders every object overlapping chunk index onto a new surface.
+        """
+        left = index * self._chunk_width
+        surface = pygame.Surface((self._chunk_width, self._height), pygame.SRCALPHA).convert_alpha()
+        for obj in self._objects:
+            if obj._rect.right > left and obj._rect.left < left + self._chunk_width:
+                obj.draw(left, self._top, surface)
+        self.builds += 1
+        return surface
+
+    def _get(self, index):
+        """
+        Returns the surface for chunk index, building it and evicting the least recently used chunk if needed.
+        """
+        surface = self._chunks.get(index)
+        if surface is not None:
+            self.hits += 1
+            self._chunks.move_to_end(index)
+            return surface
+
+        surface = self._build(index)
+        self._chunks[index] = surface
+        if len(self._chunks) > self._capacity:
+            self._chunks.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def draw(self, offset_x, offset_y):
+        """
+        Draws the chunks visible at the given camera offset and prepares the next one.
+        """
+        first = max(offset_x, self._left) // self._chunk_width
+        last = (min(offset_x + SCREEN_WIDTH, self._right) - 1) // self._chunk_width
+
+        # Drop chunks that have scrolled off the left of the screen.
+        for index in [index for index in self._chunks if index < first]:
+            del self._chunks[index]
+            self.evictions += 1
+
+        for index in range(first, last + 1):
+            engine_instance.screen.blit(self._get(index), (index * self._chunk_width - offset_x, self._top - offset_y))
+            frame_counters["blits"] += 1
+
+        # Build the next chunk before it scrolls into view.
+        if (last + 1) * self._chunk_width < self._right and last + 1 not in self._chunks:
+            self._get(last + 1)
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        return {
+            "resident": len(self._chunks),
+            "builds": self.builds,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
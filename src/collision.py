@@ -0,0 +1,62 @@
+"""
+collision.py
+Description:
+    Optional NumPy broad-phase collision backend. Tests a rect against every entity in an EntityStore
+    with one vectorized overlap expression instead of a Python loop.
+Created:
+    Oct 17, 2026
+Preconditions:
+    NumPy is installed (it is optional; NUMPY_AVAILABLE says whether it is).
+    The EntityStore's geometry does not change after the collider is built.
+Postconditions:
+    query returns the rows and kinds of every entity overlapping the rect, in row order.
+Error Conditions:
+    NumpyCollider raises an ImportError if NumPy is not installed.
+Side Effects:
+    None.
+Invariants:
+    The x, y and kind columns are shared with the EntityStore's arrays, not copied.
+Known Faults:
+    None.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NUMPY_AVAILABLE = numpy is not None  # Whether the NumPy backend can be used.
+
+
+class NumpyCollider:
+    """
+    NumpyCollider finds every entity in an EntityStore overlapping a rect in one vectorized pass.
+    """
+    def __init__(self, store):
+        """
+        Initializes a NumpyCollider over the rows of store.
+        """
+        if numpy is None:
+            raise ImportError("the numpy collision backend requires NumPy")
+
+        # The store keeps its geometry in C arrays, so the left, top and kind columns can be wrapped without copying.
+        self._left = numpy.frombuffer(store.x, dtype=numpy.int32)
+        self._top = numpy.frombuffer(store.y, dtype=numpy.int32)
+        self._right = self._left + numpy.frombuffer(store.width, dtype=numpy.int32)
+        self._bottom = self._top + numpy.frombuffer(store.height, dtype=numpy.int32)
+        self._kind = numpy.frombuffer(store.kind, dtype=numpy.uint8)
+
+    def __len__(self):
+        """
+        Returns the number of entities each query tests.
+        """
+        return len(self._left)
+
+    def query(self, left, top, right, bottom):
+        """
+        Returns (rows, kinds) arrays for the entities overlapping the rect, using the same test as
+        pygame.Rect.colliderect.
+        """
+        mask = (self._left < right) & (left < self._right) & (self._top < bottom) & (top < self._bottom)
+        rows = numpy.flatnonzero(mask)
+        return rows, self._kind[rows]
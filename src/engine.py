@@ -22,39 +22,58 @@ Preconditions:
     The State class is defined.
 Postconditions:
     The Pygame library is initialized.
-    The game window is visible.
+    The game window is visible, unless running headless.
     the game loop is running.
 Error Conditions:
     None.
 Side Effects:
     The Pygame library is initialized for all modules.
+    Setting SHAPE_SPRINT_HEADLESS=1 before importing this module selects the SDL dummy video and audio drivers.
+    Setting SHAPE_SPRINT_TRACE to a .csv or .jsonl path streams per-frame timings to that file.
+    Setting SHAPE_SPRINT_RENDER_FPS caps the render rate (default 60) without changing the update rate.
 Invariants:
-    None.
+    States are updated UPDATE_RATE times per second of real time, however often frames are drawn.
 Known Faults:
     None.
 """
 
+import os
 import sys
+import time
 
 import pygame
 
 from keyboard import Keyboard
+from profiler import FrameProfiler, frame_counters
 
 SCREEN_WIDTH = 1600  # Screen width
 SCREEN_HEIGHT = 800  # Screen height
 
+UPDATE_RATE = 60          # State updates per second.
+MAX_FRAME_TIME = 0.25     # Longest real time (seconds) a single frame may catch up on.
+
 
 class Engine:
-    def __init__(self):
+    def __init__(self, headless=False):
         """
         Initializes an Engine object.
         """
+        # Headless engines never open a window or play sound, so use SDL's dummy drivers.
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
         # Initialize pygame.
         pygame.init()
 
-        # Create an 1600x800 window with the title "Shape Sprint".
-        pygame.display.set_caption("Shape Sprint")
-        self.screen = pygame.display.set_mode((1600, 800), flags=pygame.SCALED, vsync=1)
+        if headless:
+            # Create an off-screen 1600x800 surface.
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            # Create an 1600x800 window with the title "Shape Sprint".
+            pygame.display.set_caption("Shape Sprint")
+            self.screen = pygame.display.set_mode((1600, 800), flags=pygame.SCALED, vsync=1)
 
         # Start with an empty state.
         self.state = None
@@ -62,39 +81,161 @@ class Engine:
         # Track key presses.
         self.keyboard = Keyboard()
 
+        # Optional replay recorder or player, told about every state update.
+        self.replay = None
+
+        # Cap how often frames are drawn. Updates always run at UPDATE_RATE.
+        self.render_fps = int(os.environ.get("SHAPE_SPRINT_RENDER_FPS", 60))
+
+        # Time each frame, optionally streaming the timings to a trace file.
+        self.profiler = FrameProfiler()
+        if os.environ.get("SHAPE_SPRINT_TRACE"):
+            self.profiler.open_trace(os.environ["SHAPE_SPRINT_TRACE"])
+
     def run_loop(self):
         """
         Controls the game loop.
         """
         # Create a clock to cap the game's FPS.
         clock = pygame.time.Clock()
+        profiler = self.profiler
+
+        # Real time not yet simulated. Start with one step so the first frame has something to draw.
+        step = 1 / UPDATE_RATE
+        accumulator = step
+        previous = time.perf_counter()
+
+        # State drawn last frame. The screen still holds its picture, so it can be patched with dirty rects.
+        drawn = None
 
         while True:
+            # Idle states sleep until input arrives or their timeout passes, instead of polling every frame.
+            timeout = None if self.headless else self.state.idle_timeout()
+            if timeout is not None:
+                events = [pygame.event.wait(timeout)] + pygame.event.get()
+
+                # Don't catch up on the time spent asleep; run one update for whatever woke the loop.
+                accumulator = step
+                previous = time.perf_counter()
+            else:
+                events = pygame.event.get()
+
+            profiler.begin_frame()
+
             # Capture an events.
-            for event in pygame.event.get():
+            for event in events:
                 # Quit if the window is closed.
                 if event.type == pygame.QUIT:
+                    profiler.close_trace()
+                    if self.replay is not None:
+                        self.replay.finish()
                     sys.exit()
 
                 # Record the KEYDOWN event for the pressed key.
                 if event.type == pygame.KEYDOWN:
                     self.keyboard.set_key_down(event.key, True)
 
+                    # Toggle the perf overlay. Redraw everything next frame, so hiding it leaves nothing behind.
+                    if event.key == pygame.K_F3:
+                        profiler.show_overlay = not profiler.show_overlay
+                        drawn = None
+
                 # Record the KEYUP event for the released key.
                 if event.type == pygame.KEYUP:
                     self.keyboard.set_key_down(event.key, False)
 
-            # Update the current state.
-            self.state.update()
+                # The window was uncovered or restored, so the screen may no longer hold the last frame.
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    drawn = None
+            profiler.lap("events")
+
+            # Headless engines skip drawing and run one update per loop as fast as possible.
+            if self.headless:
+                state = self.state
+                self.update_state()
+                profiler.lap("update")
+                profiler.end_frame(state)
+                continue
+
+            # Run as many fixed-size updates as the real time since the last frame calls for.
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            steps = 0
+            while accumulator >= step:
+                self.update_state()
+                accumulator -= step
+                steps += 1
+            state = self.state
+            frame_counters["steps"] = steps
+            profiler.lap("update")
+
+            # Draw the current state, or only the parts of it that changed since it was last drawn.
+            self.render(state, patch=state is drawn)
+            drawn = state
+
+            # Cap the render rate.
+            clock.tick(self.render_fps)
+            profiler.lap("tick")
+            profiler.end_frame(state)
+
+    def render(self, state, patch=False):
+        """
+        Draws state and presents it. With patch, the screen still holds state's previous frame, so only
+        the rects state reports as dirty are redrawn and presented.
+        """
+        profiler = self.profiler
+        rects = state.dirty_rects() if patch and not profiler.show_overlay else None
 
-            # Draw the current state.
+        if rects is None:
             self.screen.fill((64, 64, 64))
-            self.state.draw()
+            state.draw()
+            if profiler.show_overlay:
+                profiler.draw_overlay(self.screen)
+            frame_counters["full_redraws"] = 1
+            profiler.lap("draw")
+
             pygame.display.flip()
+        else:
+            # Drawing with the screen clipped to each rect keeps the blits outside it cheap.
+            for rect in rects:
+                self.screen.set_clip(rect)
+                self.screen.fill((64, 64, 64))
+                state.draw()
+            self.screen.set_clip(None)
+            frame_counters["dirty_rects"] = len(rects)
+            profiler.lap("draw")
+
+            # Nothing changed, so there is nothing to present.
+            if rects:
+                pygame.display.update(rects)
+        profiler.lap("flip")
+
+    def update_state(self):
+        """
+        Updates the current state once, letting the replay recorder or player see the update.
+        """
+        if self.replay is not None:
+            self.replay.before_update(self)
+        self.state.update()
+        if self.replay is not None:
+            self.replay.after_update(self)
+
+    def run_headless(self, max_frames, stop=None):
+        """
+        Steps the current state up to max_frames times without drawing, flipping, or capping the FPS.
+        Stops early once stop(state) returns True. Returns the number of frames stepped.
+        """
+        for frame in range(max_frames):
+            # Update the current state.
+            self.update_state()
+
+            # Stop once the caller is satisfied.
+            if stop is not None and stop(self.state):
+                return frame + 1
 
-            # Cap the FPS at 60.
-            clock.tick(60)
+        return max_frames
 
 
 # Global Engine instance.
-engine_instance = Engine()
+engine_instance = Engine(headless=os.environ.get("SHAPE_SPRINT_HEADLESS") == "1")
@@ -0,0 +1,168 @@
+"""
+entity_store.py
+Description:
+    Stores level entities as parallel arrays of kinds, pixel positions, pixel sizes and flags, with one
+    shared set of sprites per kind, and provides thin Object-like views onto single entities.
+Created:
+    Oct 17, 2026
+Preconditions:
+    Records give positions and sizes in whole tiles.
+    Every kind in the store has an entry in the sprites mapping.
+Postconditions:
+    An entity costs 18 bytes of array storage however many views of it are made.
+Error Conditions:
+    OverflowError is raised if a position or size in pixels does not fit in a signed 32-bit integer.
+Side Effects:
+    None.
+Invariants:
+    Rows are never added or removed once the store is built; only flags change.
+    A view reads its entity's row every time, so it always agrees with the store.
+Known Faults:
+    None.
+"""
+
+from array import array
+from operator import add
+
+import pygame
+
+from engine import engine_instance
+from object import TILE_SIZE, draw_row
+
+FLAG_ACTIVATED = 1  # The entity has been triggered (e.g. a used gravity inverter).
+
+
+class EntityStore:
+    """
+    EntityStore keeps one row per level entity in contiguous arrays.
+    """
+    def __init__(self, records, sprites):
+        """
+        Initializes an EntityStore from (kind, x, y, width, height) records in tiles, kept in pixels. sprites maps each
+        kind to the tuple of Images shared by every entity of that kind.
+        """
+        self.kind = array("B", [record[0] for record in records])                # Kind code of each entity.
+        self.x = array("i", [record[1] * TILE_SIZE for record in records])       # World left edge in pixels.
+        self.y = array("i", [record[2] * TILE_SIZE for record in records])       # World top edge in pixels.
+        self.width = array("i", [record[3] * TILE_SIZE for record in records])   # Width in pixels.
+        self.height = array("i", [record[4] * TILE_SIZE for record in records])  # Height in pixels.
+        self.flags = bytearray(len(records))                                     # FLAG_* bits of each entity.
+        self.sprites = sprites                                                   # Map of kind to its shared Images.
+
+    def __len__(self):
+        """
+        Returns the number of entities in the store.
+        """
+        return len(self.kind)
+
+    def rect(self, row):
+        """
+        Returns the world hitbox of an entity in pixels.
+        """
+        return pygame.Rect(self.x[row], self.y[row], self.width[row], self.height[row])
+
+    def bounds(self):
+        """
+        Returns the (left, top, right, bottom) of every entity together, in pixels.
+        """
+        if not self.kind:
+            return (0, 0, 0, 0)
+        return (min(self.x), min(self.y), max(map(add, self.x, self.width)), max(map(add, self.y, self.height)))
+
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the entity arrays.
+        """
+        return sum(column.itemsize * len(column) for column in (self.kind, self.x, self.y, self.width, self.height)) + len(self.flags)
+
+
+class EntityView:
+    """
+    An EntityView is a handle on one row of an EntityStore with the interface of a level Object.
+    """
+    __slots__ = ("_store", "_row")
+    kind = None  # Kind code of the entities this class views, set by each level object class.
+    traits = 0   # Trait bits of those entities, set by each level object class.
+
+    def __init__(self, store, row):
+        """
+        Initializes a view of row in store.
+        """
+        self._store = store
+        self._row = row
+
+    def __repr__(self):
+        """
+        Returns the view's kind, row and world hitbox, for logs.
+        """
+        store, row = self._store, self._row
+        return f"{type(self).__name__}(row={row}, x={store.x[row]}, y={store.y[row]}, w={store.width[row]}, h={store.height[row]})"
+
+    @property
+    def _rect(self):
+        """
+        The world hitbox of the entity. A new Rect is returned each time, so changing it has no effect.
+        """
+        return self._store.rect(self._row)
+
+    @property
+    def _image(self):
+        """
+        The sprite shared by every entity of this kind.
+        """
+        return self._store.sprites[self._store.kind[self._row]][0]
+
+    @property
+    def _base_x(self):
+        """
+        The left column of the entity.
+        """
+        return self._store.x[self._row] // TILE_SIZE
+
+    @property
+    def _base_y(self):
+        """
+        The top row of the entity.
+        """
+        return self._store.y[self._row] // TILE_SIZE
+
+    @property
+    def _width(self):
+        """
+        The width of the entity in pixels.
+        """
+        return self._store.width[self._row]
+
+    @property
+    def _height(self):
+        """
+        The height of the entity in pixels.
+        """
+        return self._store.height[self._row]
+
+    @property
+    def activated(self):
+        """
+        Whether the entity has been triggered.
+        """
+        return bool(self._store.flags[self._row] & FLAG_ACTIVATED)
+
+    @activated.setter
+    def activated(self, value):
+        if value:
+            self._store.flags[self._row] |= FLAG_ACTIVATED
+        else:
+            self._store.flags[self._row] &= ~FLAG_ACTIVATED
+
+    def draw(self, offset_x=0, offset_y=0, target=None):
+        """
+        Draws the entity's sprite across its hitbox, shifted by the camera offset.
+        """
+        store, row = self._store, self._row
+        draw_row(self._image, store.x[row] - offset_x, store.y[row] - offset_y, store.width[row], target)
+
+    def draw_hitbox(self, color=(255, 0, 0), offset_x=0, offset_y=0):
+        """
+        Draws the outline of the hitbox.
+        """
+        pygame.draw.rect(engine_instance.screen, color, self._rect.move(-offset_x, -offset_y), 2)
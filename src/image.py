@@ -1,7 +1,7 @@
 """
 image.py
 Description:
-    Provides a wrapper around a pygame.image object.
+    Provides a wrapper around a pygame.image object and a shared texture cache.
 Programmers:
     Steve Gan
     Sean Hammell
@@ -15,23 +15,112 @@ Revisions:
     Dec 07, 2024: Added in-frame check to blit - Sean Hammell
 Preconditions:
     The Pygame library is initialized.
+    The display mode has been set (required to convert surfaces to the screen's pixel format).
     The file passed to the constructor is a valid image file
         (https://www.pygame.org/docs/ref/image.html)
 Postconditions:
     An image is available to draw to the screen.
+    Every image file is decoded at most once per process, unless a load races its preload.
 Error Conditions:
     __init__ will raise an exception if the image file is invalid or missing.
+        When the engine is headless the exception is raised on first use instead.
 Side Effects:
-    None.
+    Decoded surfaces stay resident in texture_cache for the life of the process.
 Invariants:
-    None.
+    Surfaces handed out by texture_cache are shared and must not be drawn on.
 Known Faults:
     None.
 """
 
+import os
+import threading
+
 import pygame
 
 from engine import engine_instance, SCREEN_WIDTH, SCREEN_HEIGHT
+from profiler import frame_counters
+
+
+class TextureCache:
+    """
+    Decodes each image file once, converts it to the display's pixel format, and shares the result.
+    """
+    def __init__(self):
+        """
+        Initializes an empty TextureCache.
+        """
+        # Map normalized file paths to converted surfaces.
+        self._surfaces = {}
+
+        # Map normalized file paths to surfaces decoded by preload but not yet converted.
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+        # Track how well the cache is doing.
+        self.hits = 0
+        self.misses = 0
+        self.preloaded = 0
+        self.bytes = 0
+
+    def load(self, file):
+        """
+        Returns the shared surface for an image file, decoding it on first use.
+        """
+        key = os.path.normpath(file)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        # Use the preloaded decode if there is one, otherwise decode the file now.
+        with self._lock:
+            surface = self._decoded.pop(key, None)
+        if surface is None:
+            self.misses += 1
+            surface = pygame.image.load(file)
+        else:
+            self.preloaded += 1
+
+        # Convert the surface so blits don't have to convert pixels every frame.
+        if surface.get_flags() & pygame.SRCALPHA:
+            surface = surface.convert_alpha()
+        else:
+            surface = surface.convert()
+
+        self._surfaces[key] = surface
+        self.bytes += surface.get_pitch() * surface.get_height()
+        return surface
+
+    def preload(self, file):
+        """
+        Decodes an image file ahead of its first load. Safe to call from a worker thread; the surface
+        is converted to the display format by the first load on the main thread.
+        """
+        key = os.path.normpath(file)
+        if key in self._surfaces or key in self._decoded:
+            return
+
+        surface = pygame.image.load(file)
+        with self._lock:
+            if key not in self._surfaces:
+                self._decoded[key] = surface
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        return {
+            "entries": len(self._surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "preloaded": self.preloaded,
+            "pending": len(self._decoded),
+            "bytes": self.bytes,
+        }
+
+
+# Global TextureCache instance.
+texture_cache = TextureCache()
 
 
 class Image:
@@ -39,16 +128,39 @@ class Image:
         """
         Initializes an Image object.
         """
-        # Load the image file.
-        self._image = pygame.image.load(file)
+        # Fetch the shared surface for the image file.
+        # Headless engines never draw, so they leave the file alone until something asks for it.
+        self._file = file
+        self._image = None if engine_instance.headless else texture_cache.load(file)
+
+    def _load(self):
+        """
+        Fetches the shared surface if it has not been fetched yet.
+        """
+        if self._image is None:
+            self._image = texture_cache.load(self._file)
+        return self._image
 
-    def blit(self, x, y):
+    def get_width(self):
         """
-        Draws the Image to the screen.
+        Returns the width of the Image in pixels.
         """
-        rect = self._image.get_rect(x=x, y=y)
-        if (rect.x + rect.w < 0 or rect.y + rect.h < 0 or rect.x > SCREEN_WIDTH or rect.y > SCREEN_HEIGHT):
+        return self._load().get_width()
+
+    def blit(self, x, y, target=None):
+        """
+        Draws the Image to the screen, or to the target surface if one is given.
+        """
+        if target is None:
+            target = engine_instance.screen
+            width, height = SCREEN_WIDTH, SCREEN_HEIGHT
+        else:
+            width, height = target.get_size()
+
+        rect = self._load().get_rect(x=x, y=y)
+        if (rect.x + rect.w < 0 or rect.y + rect.h < 0 or rect.x > width or rect.y > height):
             # Don't draw anything that isn't visible in the current frame.
             return
 
-        engine_instance.screen.blit(self._image, rect)
+        target.blit(self._image, rect)
+        frame_counters["blits"] += 1
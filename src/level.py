@@ -54,7 +54,7 @@ Error Conditions:
     - Potential game crashes or misbehavior if incompatible level layouts or object types are provided.
 
 Side Effects:
-    - Updates the positions of objects relative to the Cube’s movement, creating a scrolling effect.
+    - Advances the camera offset relative to the Cube’s movement, creating a scrolling effect.
     - Modifies the state of the Cube or triggers gameplay mechanics (e.g., checkpoint activation, game over)
       based on interactions with level objects or hazards.
 
@@ -69,8 +69,19 @@ Known Faults:
 
 """
 
+import os
+
+import pygame
+
+import log # import the debug log
+
 from engine import SCREEN_WIDTH, SCREEN_HEIGHT
-from object import Object, TILE_SIZE # import obj and tile size
+from chunk_cache import ChunkCache, CHUNK_TILES # import chunk cache
+from collision import NumpyCollider, NUMPY_AVAILABLE # import the optional NumPy collision backend
+from entity_store import EntityStore, EntityView, FLAG_ACTIVATED # import the entity arrays and views
+from image import Image # import image
+from object import Object, TILE_SIZE, draw_row # import obj, tile size and row drawing
+from profiler import frame_counters # import per-frame counters
 
 TOLERANCE = 2 # set tolerance
 
@@ -79,6 +90,20 @@ VERTICAL_TILES = int(SCREEN_HEIGHT / TILE_SIZE) - 1 # set vert tiles
 
 GROUND_LEVEL = VERTICAL_TILES - 2 # set ground level
 
+# Kind codes for level records. A record is (kind, x, y, width, height) in tiles.
+KIND_GROUND = 0          # ground strip
+KIND_PLATFORM = 1        # run of platforms
+KIND_CHECKPOINT = 2      # checkpoint flag
+KIND_SPIKES = 3          # run of spikes
+KIND_INVERT_GRAVITY = 4  # run of gravity inverters
+KIND_SPEED = 5           # run of speed boosts
+KIND_END = 6             # end flag
+
+# Traits of each kind of level object, combined as bits. Objects without TRAIT_SOLID are phaseable.
+TRAIT_SOLID = 1    # blocks the cube
+TRAIT_HAZARD = 2   # touching it ends the run
+TRAIT_TRIGGER = 4  # touching it does something (see GameState's trigger handlers)
+
 # A Cube is an Object which represents the playable entity in the game.
 class Cube(Object):
     # Initializes a Cube with the image path, size, and position.
@@ -96,127 +121,159 @@ class Cube(Object):
         collides_with = []  # List of objects the Cube collides with.
         
         expanded_cube_rect = self._rect.inflate(TOLERANCE, TOLERANCE) # expand cube rect
-        # Move all level objects first.
-        for obj in level._environment: # iterate over objs
-            obj.scroll_object(y) # scroll objs
-        for hazard in level._hazards: # iterate over hazards
-            hazard.scroll_object(y) # scroll hazards
+        # Move the camera first.
+        level.scroll(y) # scroll the level
         # Handle horizontal collisions.
-        collision_list = level.get_collisions(self)  # Check collisions after objects have moved.
+        collision_list = level.get_collisions(self)  # Check collisions after the camera has moved.
         for obj in collision_list: # iterate over collisions
-            if not isinstance(obj, InvertGravity) and not isinstance(obj, CheckpointFlag) and not isinstance(obj, EndFlag) and not isinstance(obj, SpeedBoost):  # Skip phaseable objects.
-                if y > 0 and abs(expanded_cube_rect.bottom - obj._rect.top) > TOLERANCE*48 or\
-                    y < 0 and abs(expanded_cube_rect.bottom - obj._rect.top) < TOLERANCE*48: # check for needed sdjustments and adjust as needed
-                    if self._rect.right > obj._rect.left:  # Moving right into an object.
+            if obj.traits & TRAIT_SOLID:  # Skip phaseable objects.
+                obj_rect = level.screen_rect(obj) # object's on-screen hitbox
+                if y > 0 and abs(expanded_cube_rect.bottom - obj_rect.top) > TOLERANCE*48 or\
+                    y < 0 and abs(expanded_cube_rect.bottom - obj_rect.top) < TOLERANCE*48: # check for needed sdjustments and adjust as needed
+                    if self._rect.right > obj_rect.left:  # Moving right into an object.
                         collision_checks['right'] = True # set right collision
-                        self._rect.right = obj._rect.left # move rect to left
+                        self._rect.right = obj_rect.left # move rect to left
             collides_with.append(obj) # append to collisions
             collision_list.remove(obj) # remove obj from collision list
         
         # Handle vertical collisions.
         for obj in collision_list: # iterate over objects in collision list
-            if not isinstance(obj, InvertGravity) and not isinstance(obj, CheckpointFlag) and not isinstance(obj, EndFlag) and not isinstance(obj, SpeedBoost):  # Skip phaseable objects.
-                if gravity == 1 and y >= 0 and expanded_cube_rect.bottom > obj._rect.top:  # Moving down with gravity
+            if obj.traits & TRAIT_SOLID:  # Skip phaseable objects.
+                obj_rect = level.screen_rect(obj) # object's on-screen hitbox
+                if gravity == 1 and y >= 0 and expanded_cube_rect.bottom > obj_rect.top:  # Moving down with gravity
                     collision_checks['bottom'] = True  # Set bottom collision to true
-                    self._rect.bottom = obj._rect.top  # Align bottom of self to top of obj
-                elif gravity == -1 and y <= 0 and expanded_cube_rect.top < obj._rect.bottom:  # Moving up with gravity
+                    self._rect.bottom = obj_rect.top  # Align bottom of self to top of obj
+                elif gravity == -1 and y <= 0 and expanded_cube_rect.top < obj_rect.bottom:  # Moving up with gravity
                     collision_checks['top'] = True  # Set top collision to true
-                    self._rect.top = obj._rect.bottom  # Align top of self to bottom of obj
-                elif y > 0 and expanded_cube_rect.bottom > obj._rect.top:  # General case: moving down
+                    self._rect.top = obj_rect.bottom  # Align top of self to bottom of obj
+                elif y > 0 and expanded_cube_rect.bottom > obj_rect.top:  # General case: moving down
                     collision_checks['bottom'] = True  # Set bottom collision to true
-                    self._rect.bottom = obj._rect.top  # Align bottom of self to top of obj
-                elif y < 0 and expanded_cube_rect.top < obj._rect.bottom:  # General case: moving up
+                    self._rect.bottom = obj_rect.top  # Align bottom of self to top of obj
+                elif y < 0 and expanded_cube_rect.top < obj_rect.bottom:  # General case: moving up
                     collision_checks['top'] = True  # Set top collision to true
-                    self._rect.top = obj._rect.bottom  # Align top of self to bottom of obj
+                    self._rect.top = obj_rect.bottom  # Align top of self to bottom of obj
 
                 collides_with.append(obj)  # Append collided object to the list
 
-        print(collision_list, collision_checks)
+        if log.collision.debug: # only when collision debugging is on
+            log.collision.log(log.DEBUG, "%r %r", collision_list, collision_checks) # buffer the collisions
         return collision_checks, collides_with # return the lists
 
-class Ground(Object): #class for ground
-    def __init__(self, x, y, id):
-        """
-        Initializes a ground tile.
-        """
-        if id == 0:
-            super().__init__("assets/ground.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 1:
-            super().__init__("assets/lvl2Ground.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 2:
-            super().__init__("assets/sandGround.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 3:
-            super().__init__("assets/iceGround.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 4:
-            super().__init__("assets/fireGround.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
+# Level entities are views onto the Level's EntityStore; their sprites are shared per kind.
+class Ground(EntityView): #class for ground
+    """
+    A strip of ground tiles: a top row over three lower rows.
+    """
+    __slots__ = ()
+    kind = KIND_GROUND
+    traits = TRAIT_SOLID
 
-class GroundLower(Object): #class for ground
-    def __init__(self, x, y, id):
+    def draw(self, offset_x=0, offset_y=0, target=None):
         """
-        Initializes a ground tile.
+        Draws the top row of the strip followed by the lower rows.
         """
-        if id == 0:
-            super().__init__("assets/groundLower.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 1:
-            super().__init__("assets/lvl2GroundLower.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 2:
-            super().__init__("assets/sandGroundLower.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 3:
-            super().__init__("assets/iceGroundLower.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 4:
-            super().__init__("assets/fireGroundLower.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
+        store, row = self._store, self._row # the entity's row
+        x = store.x[row] - offset_x # on-screen x
+        y = store.y[row] - offset_y # on-screen y
+        top, lower = store.sprites[store.kind[row]] # top and lower row images
+        draw_row(top, x, y, store.width[row], target) # draw top row
+        for tile_row in range(1, store.height[row] // TILE_SIZE): # for each lower row
+            draw_row(lower, x, y + tile_row * TILE_SIZE, store.width[row], target) # draw lower row
+
+class Platform(EntityView): # class for platform
+    """
+    A run of platform tiles.
+    """
+    __slots__ = ()
+    kind = KIND_PLATFORM
+    traits = TRAIT_SOLID
 
-class Platform(Object): # class for platform
-    def __init__(self, x, y):
-        """
-        Initializes a platform tile.
-        """
-        super().__init__("assets/platform.png", x, y, TILE_SIZE, TILE_SIZE)#supers with dimensions
+class CheckpointFlag(EntityView): #class for checkpoint
+    """
+    A flag to serve as a mid-level checkpoint.
+    """
+    __slots__ = ()
+    kind = KIND_CHECKPOINT
+    traits = TRAIT_TRIGGER
+
+class EndFlag(EntityView): #class for end flag
+    """
+    A flag to signify the end of a level.
+    """
+    __slots__ = ()
+    kind = KIND_END
+    traits = TRAIT_TRIGGER
+
+class Spikes(EntityView): # class for spikes
+    """
+    A run of hazardous spikes tiles.
+    """
+    __slots__ = ()
+    kind = KIND_SPIKES
+    traits = TRAIT_SOLID | TRAIT_HAZARD
+
+class InvertGravity(EntityView): # class to represent grav inversion
+    """
+    A single gravity inverter tile. activated is stored in the EntityStore's flags.
+    """
+    __slots__ = ()
+    kind = KIND_INVERT_GRAVITY
+    traits = TRAIT_TRIGGER
+
+class SpeedBoost(EntityView): # class to represent speed boost
+    """
+    A run of speed boosts.
+    """
+    __slots__ = ()
+    kind = KIND_SPEED
+    traits = TRAIT_TRIGGER
+
+class Tile:
+    """
+    One grid tile of a level object that the cube is touching. Spans are stored merged, but collisions are
+    resolved tile by tile, so a span plays exactly like the separate tiles it replaced.
+    """
+    __slots__ = ("view", "kind", "traits", "rect")
 
-class CheckpointFlag(Object): #class for checkpoint
-    def __init__(self, x, y):
+    def __init__(self, view, x, y, height):
         """
-        Initializes a flag to serve as a mid-level checkpoint.
+        Initializes the tile of view whose world top left corner is (x, y) in pixels.
         """
-        super().__init__("assets/checkpoint.png", x, y, TILE_SIZE, TILE_SIZE * 2)#supers with dimensions
+        self.view = view                                  # The level object the tile belongs to.
+        self.kind = view.kind                             # Kind code of that object.
+        self.traits = view.traits                         # Trait bits of that object.
+        self.rect = pygame.Rect(x, y, TILE_SIZE, height)  # World hitbox of the tile.
 
-class EndFlag(Object): #class for end flag
-    def __init__(self, x, y):
+    def __repr__(self):
         """
-        Initializes a flag to signify the end of a level.
+        Returns the tile's kind and position, for logs.
         """
-        super().__init__("assets/end.png", x, y, TILE_SIZE, TILE_SIZE * 2)#supers with dimensions
+        return f"{type(self.view).__name__}({self._base_x}, {self._base_y})"
 
-class Spikes(Object): # class for spikes
-    def __init__(self, x, y, id):
+    @property
+    def _base_x(self):
         """
-        Initializes a hazardous spikes tile.
+        The column of the tile.
         """
-        if id == 0:
-            super().__init__("assets/spikes.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 1:
-            super().__init__("assets/lvl2Spikes.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 2:
-            super().__init__("assets/sandSpikes.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 3:
-            super().__init__("assets/iceSpikes.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
-        elif id == 4:
-            super().__init__("assets/fireSpikes.png", x, y, TILE_SIZE, TILE_SIZE) #supers with dimensions
+        return self.rect.x // TILE_SIZE
 
-class InvertGravity(Object): # class to represent grav inversion
-    def __init__(self, x, y):
+    @property
+    def _base_y(self):
         """
-        Initializes a gravity inverter object 
+        The row of the tile.
         """
-        super().__init__("assets/gravity_flip.png", x, y, TILE_SIZE, TILE_SIZE * 2) #supers with dimensions
-        self.activated = False # set activatioon bool to false
+        return self.rect.y // TILE_SIZE
 
-class SpeedBoost(Object): # class to represent speed boost
-    def __init__(self, x, y):
+    @property
+    def activated(self):
         """
-        Initializes a gravity inverter object 
+        Whether the object has been triggered. Gravity inverters are one tile each, so this is per tile.
         """
-        super().__init__("assets/speed.png", x, y, TILE_SIZE, TILE_SIZE * 2) #supers with dimensions
+        return self.view.activated
+
+    @activated.setter
+    def activated(self, value):
+        self.view.activated = value
 
 """
 A note on the level specifications:
@@ -229,9 +286,12 @@ A note on the level specifications:
     'spikes' stores the (x0, x1, y) position of each set of spikes. For example,
     (0, 240, 780) will lay spikes from 0 to 240 on the x-axis at a height of 780.
 
-    Since 'ground' and 'spikes' store ranges, when the Level parses them, it iterates
-    over the ranges in steps equal to the width of the tiles (120 at the time of
-    writing).
+    Since 'ground' and 'spikes' store ranges, when the Level parses them, each range
+    becomes a single object whose hitbox covers the whole span. The sprite is repeated
+    across the span when drawn, so a span costs one collision check however long it is.
+    'platforms' and 'speed' ranges are handled the same way. Collisions are still resolved
+    per tile within a span. 'invertGravity' ranges become one object per tile, since each
+    tile flips gravity the first time it is touched.
 
     'platforms' stores the (x, y) position of each platform tile.
 
@@ -485,71 +545,344 @@ levels = { # levels
     4: level4, #level 4
 }
 
+# Map of record kind to the view class of its entities.
+KIND_VIEWS = {
+    KIND_GROUND: Ground,
+    KIND_PLATFORM: Platform,
+    KIND_CHECKPOINT: CheckpointFlag,
+    KIND_SPIKES: Spikes,
+    KIND_INVERT_GRAVITY: InvertGravity,
+    KIND_SPEED: SpeedBoost,
+    KIND_END: EndFlag,
+}
+
+# Ground and spike sprites for each level id: (top row, lower rows) and spikes.
+GROUND_SPRITES = {
+    0: ("assets/ground.png", "assets/groundLower.png"),
+    1: ("assets/lvl2Ground.png", "assets/lvl2GroundLower.png"),
+    2: ("assets/sandGround.png", "assets/sandGroundLower.png"),
+    3: ("assets/iceGround.png", "assets/iceGroundLower.png"),
+    4: ("assets/fireGround.png", "assets/fireGroundLower.png"),
+}
+SPIKE_SPRITES = {
+    0: "assets/spikes.png",
+    1: "assets/lvl2Spikes.png",
+    2: "assets/sandSpikes.png",
+    3: "assets/iceSpikes.png",
+    4: "assets/fireSpikes.png",
+}
+
+def kind_sprites(kind, id):
+    """
+    Returns the asset paths of the sprites shared by every entity of a kind in level id.
+    """
+    if kind == KIND_GROUND:
+        return GROUND_SPRITES[id]
+    if kind == KIND_SPIKES:
+        return (SPIKE_SPRITES[id],)
+    return ({
+        KIND_PLATFORM: "assets/platform.png",
+        KIND_CHECKPOINT: "assets/checkpoint.png",
+        KIND_INVERT_GRAVITY: "assets/gravity_flip.png",
+        KIND_SPEED: "assets/speed.png",
+        KIND_END: "assets/end.png",
+    }[kind],)
+
+def level_records(specs):
+    """
+    Flattens a level specification into a list of (kind, x, y, width, height) records, in level order.
+    """
+    records = [] # records in level order
+    if specs["ground"]: # if ground
+        records.append((KIND_GROUND, specs["ground"][0], VERTICAL_TILES - 1, specs["ground"][1] - specs["ground"][0], 4))
+    for group in specs["platforms"] or (): # For each span in the platform list.
+        records.append((KIND_PLATFORM, group[0], group[2], group[1] - group[0], 1))
+    for checkpoint in specs["checkpoints"] or (): # For each position in the checkpoint list.
+        records.append((KIND_CHECKPOINT, checkpoint[0], checkpoint[1], 1, 2))
+    for group in specs["spikes"] or (): # For each span in the spikes list.
+        records.append((KIND_SPIKES, group[0], group[2], group[1] - group[0], 1))
+    for group in specs["invertGravity"] or (): # For each span in the gravity inverter list.
+        for x in range(group[0], group[1]): # one record per tile, each with its own activated flag
+            records.append((KIND_INVERT_GRAVITY, x, group[2], 1, 2))
+    for group in specs["speed"] or (): # For each span in the speed list.
+        records.append((KIND_SPEED, group[0], group[2], group[1] - group[0], 2))
+    records.append((KIND_END, specs["end"][0], specs["end"][1], 1, 2)) # the end flag
+    return records
+
+
+# Streaming window: objects are live from this far past the right edge of the screen...
+STREAM_AHEAD = 2 * SCREEN_WIDTH
+# ...until they end this far behind the left edge. One chunk, so chunks that are still drawn never lose objects.
+STREAM_BEHIND = CHUNK_TILES * TILE_SIZE
+
+COLLISION_BACKENDS = ("columns", "numpy") # Names of the collision backends Level accepts.
+
+
+class Camera:
+    """
+    The Camera stores how far the view has scrolled through the level and how fast it is scrolling.
+    """
+    def __init__(self, offset_x=0, offset_y=0):
+        """
+        Initializes the camera at the given world offset.
+        """
+        self.offset_x = offset_x            # Horizontal scroll (pixels) from the level origin.
+        self.offset_y = offset_y            # Vertical scroll (pixels) from the level origin.
+        self._speed = int(TILE_SIZE / 5)    # Base scroll speed.
+        self._acceleration = 0              # Extra speed gained over time.
+        self._counter = 0                   # Scrolls since the last acceleration step.
+
+    def scroll(self, dy):
+        """
+        Advances the camera one step to the right and dy pixels vertically.
+        """
+        if self._counter == 120: # if two secs pass
+            self._acceleration += 1 # increment accel
+            self._counter = 0 # reset counter
+        self._counter += 1 # increment counter
+
+        self.offset_x += self._speed + self._acceleration  # move the view right.
+        self.offset_y += round(dy)                         # move the view vertically, rounding like pygame.Rect does.
+
+class LevelSnapshot:
+    """
+    A LevelSnapshot stores the camera and which live gravity inverters have been activated.
+    """
+    def __init__(self, offset_x, offset_y, acceleration, counter, activated):
+        """
+        Initializes a LevelSnapshot. activated is a set of the store rows of activated gravity inverters.
+        """
+        self.offset_x = offset_x          # Camera horizontal offset.
+        self.offset_y = offset_y          # Camera vertical offset.
+        self.acceleration = acceleration  # Camera acceleration.
+        self.counter = counter            # Scrolls since the last acceleration step.
+        self.activated = activated        # Rows of the activated gravity inverters.
 
 class Level:
     """
     Levels stores, manages, and checks for collisions with the environment and hazards of the game.
     """
-    def __init__(self, specs, start):
+    def __init__(self, specs, start, stream=True, collisions=None):
         """
         Initializes the level environment, hazards, and starting position.
+        specs is either a level specification dict or a compiled level from level_format.load_level.
+        A streaming level only keeps objects near the screen live; otherwise every object is built up front.
+        collisions picks the collision backend: "columns" (the column index) or "numpy" (NumpyCollider).
+        It defaults to SHAPE_SPRINT_COLLISIONS, falling back to "columns" when NumPy is not installed.
+        """
+        if isinstance(specs, dict): # authored specification
+            self.id = specs["id"]             # Record the level ID.
+            records = level_records(specs)    # Flatten the specification into records.
+        else: # compiled level (see level_format.py)
+            self.id = specs.id                # Record the level ID.
+            records = list(specs.records())   # Read the records straight from the compiled buffer.
+
+        # Store the records in draw order (environment, then hazards), so a row number is also its draw order.
+        ordered = [record for record in records if record[0] != KIND_SPIKES] + [record for record in records if record[0] == KIND_SPIKES]
+        sprites = {kind: tuple(Image(path) for path in kind_sprites(kind, self.id)) for kind in {record[0] for record in ordered}} # one set per kind
+        self._store = EntityStore(ordered, sprites) # The level's entities.
+        self._by_left = sorted(range(len(self._store)), key=self._store.x.__getitem__) # Rows sorted by their left edge.
+        self._stream = stream # Whether objects are streamed in and out.
+        self._next = 0        # Index of the next row in _by_left to materialize.
+        self._window = None   # Left edge (pixels) of the live window, once synced.
+
+        self._live = {}       # Map of row to live view.
+        self._objects = []    # Live views in draw order, shared with the chunk cache.
+        self._columns = {}    # Map of tile column to a list of rows, for collision queries.
+        self._queries = 0     # Number of collision queries made.
+        self._candidates = 0  # Number of objects examined by those queries.
+        self.materialized = 0 # Number of objects created.
+        self.released = 0     # Number of objects released.
+
+        self._camera = Camera(start[0] * TILE_SIZE)  # Start the camera at the start position.
+
+        # Pre-render the level in chunks as it scrolls into view. Chunks span the whole level's height.
+        self._chunks = ChunkCache(self._objects, bounds=self._store.bounds())
+
+        if collisions is None: # pick the backend from the environment
+            collisions = os.environ.get("SHAPE_SPRINT_COLLISIONS", "columns")
+            if collisions == "numpy" and not NUMPY_AVAILABLE: # NumPy is optional
+                collisions = "columns"
+        if collisions not in COLLISION_BACKENDS:
+            raise ValueError(f"unknown collision backend {collisions!r}")
+        self.collisions = collisions # Name of the collision backend.
+        self._collider = NumpyCollider(self._store) if collisions == "numpy" else None # Vectorized backend, if used.
+
+        self._sync() # Build the objects around the start position.
+
+    def _add(self, row):
+        """
+        Makes an entity live and adds it to the buckets of the columns it covers.
+        """
+        store = self._store # the entities
+        self._live[row] = KIND_VIEWS[store.kind[row]](store, row) # track a view of it
+        for column in range(store.x[row] // TILE_SIZE, (store.x[row] + store.width[row] - 1) // TILE_SIZE + 1): # for each column the entity covers
+            self._columns.setdefault(column, []).append(row) # add it to that column's bucket
+        self.materialized += 1 # count it
+
+    def _remove(self, row):
+        """
+        Releases a live entity, removes it from the column buckets and clears its flags.
+        """
+        store = self._store # the entities
+        del self._live[row] # stop tracking it
+        for column in range(store.x[row] // TILE_SIZE, (store.x[row] + store.width[row] - 1) // TILE_SIZE + 1): # for each column the entity covers
+            bucket = self._columns[column] # that column's bucket
+            bucket.remove(row) # take it out
+            if not bucket: # drop empty buckets
+                del self._columns[column]
+        store.flags[row] = 0 # it comes back fresh if the camera returns
+        self.released += 1 # count it
+
+    def _sync(self):
+        """
+        Materializes entities entering the look-ahead window and releases those that have fallen behind it.
         """
-        self.id = specs["id"]   # Record the level ID.
-        self._environment = []  # Create an empty environment list.
-        self._hazards = []      # Create an empty hazards list.
-
-        if specs["ground"]:
-            for x in range(specs["ground"][0], specs["ground"][1]):  # For the range of x positions in the ground list.
-                for i in range(-1, 3): #add four total tiles
-                    if i == -1: #if top tile
-                        self._environment.append(Ground(x, VERTICAL_TILES + i, self.id))                  # Create a ground tile.
-                    else: #not top tile
-                        self._environment.append(GroundLower(x, VERTICAL_TILES + i, self.id))                  # Create a lower ground tile.
-        if specs["platforms"]: # if platforms
-            for group in specs["platforms"]:                               # For each position in the platform list.
-                for x in range(group[0], group[1]): #iterate
-                    self._environment.append(Platform(x, group[2]))  # Create a platform.
-        if specs["checkpoints"]: #if checkpoints
-            for checkpoint in specs["checkpoints"]:                                     # For each position in the checkpoint list.
-                self._environment.append(CheckpointFlag(checkpoint[0], checkpoint[1]))  # Create a checkpoint flag.
-        if specs["spikes"]: #if spieks
-            for group in specs["spikes"]:                      # For each position in the spikes list.
-                for x in range(group[0], group[1]):       # for the range of x positions in the spike set.
-                    self._hazards.append(Spikes(x, group[2], self.id))  # Create a set of spikes.
-        if specs["invertGravity"]: #if grav
-            for group in specs["invertGravity"]:                      # For each position in the gravity inverter list.
-                for x in range(group[0], group[1]):       # for the range of x positions in the gravity inverter set.
-                    self._environment.append(InvertGravity(x, group[2]))  # Create a set of gravity inverters.
-        if specs["speed"]: #if speed
-            for group in specs["speed"]:                      # For each position in the speed list.
-                for x in range(group[0], group[1]):       # for the range of x positions in the speed set.
-                    self._environment.append(SpeedBoost(x, group[2]))  # Create a set of speed.
-
-        self._environment.append(EndFlag(specs["end"][0], specs["end"][1]))  # Create the end flag.
-
-        for obj in self._environment + self._hazards:    # For each environment object.
-            obj.move_x(-1 * start[0] * TILE_SIZE)                             # Offset it to the start position.
+        if self._stream: # window around the screen
+            left = self._camera.offset_x - STREAM_BEHIND              # Objects ending before this are released.
+            right = self._camera.offset_x + SCREEN_WIDTH + STREAM_AHEAD  # Objects starting before this are live.
+        else: # the whole level
+            left, right = float("-inf"), float("inf")
+
+        if self._window is not None and left < self._window: # the camera moved back
+            self._next = 0 # rescan from the start
+
+        store = self._store # the entities
+        xs, widths = store.x, store.width # their columns and widths
+        changed = False # whether the live set changed
+        while self._next < len(self._by_left) and xs[self._by_left[self._next]] < right: # rows starting inside the window
+            row = self._by_left[self._next] # next row
+            if row not in self._live and xs[row] + widths[row] > left: # not live yet and not already behind
+                self._add(row) # make it live
+                changed = True
+            self._next += 1 # move on
+
+        if self._window is None or left // TILE_SIZE != self._window // TILE_SIZE: # crossed a column since the last release check
+            for row in [row for row in self._live if xs[row] + widths[row] <= left]: # rows behind the window
+                self._remove(row) # release them
+                changed = True
+        self._window = left # remember the window
+
+        if changed: # keep the draw-ordered list in step
+            self._objects[:] = [self._live[row] for row in sorted(self._live)]
+
+    def scroll(self, dy):
+        """
+        Scrolls the level one step, moving dy pixels vertically.
+        """
+        self._camera.scroll(dy) # advance the camera
+        self._sync() # stream objects in and out
+
+    def snapshot(self):
+        """
+        Returns a LevelSnapshot of the camera and the gravity inverters.
+        """
+        camera = self._camera # the camera
+        flags = self._store.flags # entity flags
+        activated = {row for row in self._live if flags[row] & FLAG_ACTIVATED} # used inverters
+        return LevelSnapshot(camera.offset_x, camera.offset_y, camera._acceleration, camera._counter, activated)
+
+    def restore(self, snapshot):
+        """
+        Puts the camera and gravity inverters back the way they were when snapshot was taken.
+        """
+        camera = self._camera # the camera
+        camera.offset_x, camera.offset_y = snapshot.offset_x, snapshot.offset_y # move the view back
+        camera._acceleration, camera._counter = snapshot.acceleration, snapshot.counter # restore the speed
+        flags = self._store.flags # entity flags
+        for row in range(len(flags)): # for each entity
+            flags[row] = FLAG_ACTIVATED if row in snapshot.activated else 0 # restore whether it was used
+        self._sync() # stream the window back in
+
+    def screen_rect(self, tile):
+        """
+        Returns the on-screen hitbox of a Tile.
+        """
+        return tile.rect.move(-self._camera.offset_x, -self._camera.offset_y) # translate from world to screen
 
     def draw(self):
         """
         Draws all environment and hazard objects.
         """
-        for obj in self._environment + self._hazards: #iterate over environment and hazards
-            obj.draw() # draw everything
+        self._chunks.draw(self._camera.offset_x, self._camera.offset_y) # draw the visible chunks
 
     def get_collisions(self, cube):
         """
-        Returns a list of objects colliding with the cube.
+        Returns a list of the Tiles colliding with the cube, in level order.
         """
-        collision_list = []                               # List of objects colliding with the Cube.
+        # Expand the cube's rect by the tolerance and move it into world coordinates.
+        expanded_cube_rect = cube._rect.inflate(TOLERANCE, TOLERANCE).move(self._camera.offset_x, self._camera.offset_y)
+        left, top, right, bottom = expanded_cube_rect.left, expanded_cube_rect.top, expanded_cube_rect.right, expanded_cube_rect.bottom
+
+        if self._collider is not None: # vectorized backend
+            rows, _ = self._collider.query(left, top, right, bottom) # every overlapping entity
+            self._count_query(len(self._collider)) # every entity was tested
+            return self._tiles([row for row in rows.tolist() if row in self._live], expanded_cube_rect) # live ones, in level order
+
+        collisions = set()  # Rows colliding with the Cube.
+
+        store = self._store # the entities
+        xs, ys, widths, heights = store.x, store.y, store.width, store.height # their world geometry
+        candidates = 0 # objects examined by this query
+        for column in range(left // TILE_SIZE, (right - 1) // TILE_SIZE + 1):  # For each column the Cube covers.
+            bucket = self._columns.get(column, ()) # rows in that column
+            candidates += len(bucket) # count the candidates
+            for row in bucket:  # For each entity in that column.
+                x, y = xs[row], ys[row] # its top left corner
+                # If the expanded rectangles overlap (the same test as pygame.Rect.colliderect)
+                if left < x + widths[row] and x < right and top < y + heights[row] and y < bottom:
+                    collisions.add(row)  # Add it to the collisions.
+
+        self._count_query(candidates) # count the query
+
+        return self._tiles(sorted(collisions), expanded_cube_rect)  # Return the collisions in level order.
+
+    def _count_query(self, candidates):
+        """
+        Counts a collision query that examined candidates objects, and reports it to the profiler.
+        """
+        self._queries += 1 # count the query
+        self._candidates += candidates # count the candidates
+        frame_counters["queries"] += 1 # report the query to the profiler
+        frame_counters["candidates"] += candidates # report the candidates to the profiler
 
-        # Expand the cube's rect and each object's rect by the tolerance
-        expanded_cube_rect = cube._rect.inflate(TOLERANCE, TOLERANCE)
+    def _tiles(self, rows, area):
+        """
+        Returns the Tiles of the given rows that overlap the world rect area.
+        A row's tiles run left to right; ground tiles run down each column, top row first.
+        """
+        store = self._store # the entities
+        tiles = [] # overlapping tiles in level order
+        for row in rows: # for each colliding entity
+            view = self._live[row] # its view
+            x, y, width, height = store.x[row], store.y[row], store.width[row], store.height[row] # its world geometry
+            if store.kind[row] == KIND_GROUND: # ground is a stack of single tiles
+                tile_ys, tile_height = range(max(y, area.top // TILE_SIZE * TILE_SIZE), min(y + height, area.bottom), TILE_SIZE), TILE_SIZE
+            else: # everything else is one tile tall
+                tile_ys, tile_height = (y,), height
+            for tile_x in range(max(x, area.left // TILE_SIZE * TILE_SIZE), min(x + width, area.right), TILE_SIZE): # overlapping columns
+                for tile_y in tile_ys: # overlapping rows
+                    tiles.append(Tile(view, tile_x, tile_y, tile_height))
+        return tiles
+
+    def object_count(self):
+        """
+        Returns the number of live objects in the level.
+        """
+        return len(self._live)
 
-        for object in self._environment + self._hazards:  # For each object in the level.
-            # Expand the object's rect by the tolerance
-            # If the expanded rectangles collide (or touch)
-            if expanded_cube_rect.colliderect(object._rect):
-                collision_list.append(object)  # Add it to the collision list.
+    def column(self):
+        """
+        Returns the tile column at the left edge of the screen.
+        """
+        return self._camera.offset_x // TILE_SIZE
 
-        return collision_list  # Return the collision list.
+    def collision_stats(self):
+        """
+        Returns the collision query counters as a dict.
+        """
+        return {
+            "queries": self._queries,
+            "candidates": self._candidates,
+            "candidates_per_query": self._candidates / self._queries if self._queries else 0,
+        }
@@ -0,0 +1,146 @@
+"""
+level_format.py
+Description:
+    Compiles level specifications into a compact binary format, a header followed by a fixed-width
+    table of (kind, x, y, width, height) records, and loads compiled levels by memory-mapping them.
+Created:
+    Oct 17, 2026
+Preconditions:
+    - Must be run from the src directory so the compiled level directory resolves.
+Postconditions:
+    - load_level returns a CompiledLevel that Level builds from without parsing the specification.
+    - Compiled files older than level.py are rebuilt before they are loaded.
+Error Conditions:
+    - CompiledLevel raises a ValueError for files that are empty, truncated, not compiled levels, have
+      another version or hold another level. load_level recompiles such a file once and tries again.
+    - load_level raises a KeyError if the level does not exist in level.levels.
+Side Effects:
+    - load_level writes levels/level<id>.lvl when it is missing, stale or unreadable.
+    - load_level logs a warning to the state channel when it recompiles a file or falls back to the specification dict.
+    - Loaded levels stay mapped for the rest of the process so deaths and restarts reuse them.
+Invariants:
+    - Records are stored in level order, the same order level_records produces.
+Known Faults:
+    - If the level file cannot be written or read, load_level falls back to the specification dict.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+
+if __name__ == "__main__":
+    os.environ.setdefault("SHAPE_SPRINT_HEADLESS", "1")  # Compiling needs no window; set before the engine is imported.
+
+import level
+import log
+from level import level_records, levels
+
+LEVEL_DIR = "levels"  # Directory compiled levels are written to.
+LEVEL_MAGIC = b"SSLV"
+LEVEL_VERSION = 1
+HEADER = struct.Struct("<4sBBI")  # magic, version, level id, record count
+RECORD = struct.Struct("<Bxhhhh")  # kind, (pad), x, y, width, height in tiles
+
+_loaded = {}  # Map of level id to its CompiledLevel, so a level is only mapped once.
+
+
+class CompiledLevel:
+    """
+    A CompiledLevel is a memory-mapped compiled level file.
+    """
+    def __init__(self, path, level_id=None):
+        """
+        Maps the compiled level at path and checks its header, including that it holds level_id if given.
+        """
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)  # ValueError if the file is empty.
+
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError(f"{path} is truncated")
+            magic, version, self.id, self.count = HEADER.unpack_from(self._map)
+            if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+                raise ValueError(f"{path} is not a version {LEVEL_VERSION} compiled level")
+            if level_id is not None and self.id != level_id:
+                raise ValueError(f"{path} holds level {self.id}, not level {level_id}")
+            if len(self._map) < HEADER.size + self.count * RECORD.size:
+                raise ValueError(f"{path} is truncated")
+        except ValueError:
+            self._map.close()  # Unmap it so the file can be rewritten.
+            raise
+
+    def records(self):
+        """
+        Returns an iterator over the (kind, x, y, width, height) records, unpacked straight from the map.
+        """
+        return RECORD.iter_unpack(memoryview(self._map)[HEADER.size:HEADER.size + self.count * RECORD.size])
+
+
+def compile_level(specs, path):
+    """
+    Writes a level specification to path in the compiled format.
+    """
+    records = level_records(specs)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, specs["id"], len(records)))
+        file.write(b"".join(RECORD.pack(*record) for record in records))
+
+
+def level_path(level_id, directory=LEVEL_DIR):
+    """
+    Returns the path of a compiled level.
+    """
+    return os.path.join(directory, f"level{level_id}.lvl")
+
+
+def load_level(level_id, directory=LEVEL_DIR):
+    """
+    Returns the compiled level for level_id, compiling it first if it is missing or older than level.py.
+    A file that still can't be used (another version, truncated, empty, or another level) is recompiled once.
+    """
+    compiled = _loaded.get(level_id)
+    if compiled is not None:
+        return compiled
+
+    specs = levels[level_id]
+    path = level_path(level_id, directory)
+    try:
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(level.__file__):
+            os.makedirs(directory, exist_ok=True)
+            compile_level(specs, path)
+        try:
+            compiled = CompiledLevel(path, level_id)
+        except ValueError as error:
+            if log.state.warning:
+                log.state.log(log.WARNING, "recompiling level %d: %s", level_id, error)
+            compile_level(specs, path)
+            compiled = CompiledLevel(path, level_id)  # A second failure is a bug in compile_level, so it is raised.
+    except OSError as error:
+        if log.state.warning:
+            log.state.log(log.WARNING, "loading level %d from its specification: %s", level_id, error)
+        return specs  # Level accepts the specification dict as well.
+
+    _loaded[level_id] = compiled
+    return compiled
+
+
+# Main function.
+def main():
+    """
+    Compiles every level in level.levels.
+    """
+    parser = argparse.ArgumentParser(description="Compile Shape Sprint levels to the binary level format.")
+    parser.add_argument("--output", default=LEVEL_DIR, help="directory to write compiled levels to")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for level_id, specs in levels.items():
+        path = level_path(level_id, args.output)
+        compile_level(specs, path)
+        print(f"{path}: {len(level_records(specs))} records, {os.path.getsize(path)} bytes")
+
+
+# Main entry point.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+log.py
+Description:
+    Category-based debug logging for the per-frame code. Messages go into an in-memory ring buffer
+    rather than stdout, and the buffer is written out on demand (on death, or on a crash).
+Created:
+    Oct 17, 2026
+Preconditions:
+    Level specs are comma-separated "level" or "category=level" entries, e.g. "collision=debug,state=info".
+Postconditions:
+    Only messages at or above their channel's level are kept, and only the most recent BUFFER_SIZE of them.
+Error Conditions:
+    configure raises a ValueError for an unknown category or level name.
+Side Effects:
+    dump writes the buffered messages to stderr or to the file named by SHAPE_SPRINT_LOG_FILE.
+    install_crash_dump replaces sys.excepthook.
+Invariants:
+    Messages are formatted when they are dumped, never when they are logged.
+    Callers check a channel's level flag before logging, so disabled levels cost one attribute lookup.
+Known Faults:
+    Arguments are kept by reference, so a message shows an argument as it was when dumped.
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+DEBUG = 10    # Per-frame detail.
+INFO = 20     # Notable game events.
+WARNING = 30  # Unexpected but recoverable situations.
+ERROR = 40    # Failures.
+OFF = 100     # Nothing is logged.
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}  # Level names.
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}                           # Names of the levels.
+
+CATEGORIES = ("physics", "collision", "state")  # Log channels.
+BUFFER_SIZE = 2048                              # Most messages kept in the ring buffer.
+DEFAULT_LEVEL = WARNING                         # Level of a channel nothing has configured.
+
+# Ring buffer of (time, category, level, message, args) tuples, oldest first.
+buffer = deque(maxlen=BUFFER_SIZE)
+
+
+class Channel:
+    """
+    A Channel logs messages for one category. Check the flag for a level before logging at it:
+
+        if log.physics.debug:
+            log.physics.log(log.DEBUG, "velocity %s", velocity)
+    """
+    def __init__(self, category, level=DEFAULT_LEVEL):
+        """
+        Initializes a Channel for category at the given level.
+        """
+        self.category = category
+        self.set_level(level)
+
+    def set_level(self, level):
+        """
+        Sets the lowest level the channel keeps, and the per-level flags callers check.
+        """
+        self.level = level
+        self.debug = level <= DEBUG
+        self.info = level <= INFO
+        self.warning = level <= WARNING
+        self.error = level <= ERROR
+
+    def log(self, level, message, *args):
+        """
+        Adds a message to the ring buffer. message is %-formatted with args when it is dumped.
+        """
+        if level >= self.level:
+            buffer.append((time.perf_counter(), self.category, level, message, args))
+
+
+# One Channel per category.
+physics = Channel("physics")
+collision = Channel("collision")
+state = Channel("state")
+channels = {"physics": physics, "collision": collision, "state": state}
+
+
+def configure(spec):
+    """
+    Sets channel levels from a spec such as "debug" (every channel) or "collision=debug,state=info".
+    """
+    for entry in filter(None, (entry.strip() for entry in spec.split(","))):
+        category, _, name = entry.rpartition("=")
+        if name.lower() not in LEVELS:
+            raise ValueError(f"unknown log level {name!r}")
+        if category and category not in channels:
+            raise ValueError(f"unknown log category {category!r}")
+        for channel in ([channels[category]] if category else channels.values()):
+            channel.set_level(LEVELS[name.lower()])
+
+
+def format_record(record):
+    """
+    Returns a buffered message as a line of text.
+    """
+    timestamp, category, level, message, args = record
+    try:
+        text = message % args if args else message
+    except (TypeError, ValueError):
+        text = f"{message} {args!r}"
+    return f"{timestamp:12.4f} {LEVEL_NAMES.get(level, level):>7} {category:<9} {text}"
+
+
+def dump(reason, file=None):
+    """
+    Writes the buffered messages, oldest first, under a header naming reason, then empties the buffer.
+    Writes to file if given, otherwise to SHAPE_SPRINT_LOG_FILE (appending) or stderr. Does nothing if
+    the buffer is empty.
+    """
+    if not buffer:
+        return
+
+    lines = [f"--- log dump: {reason} ({len(buffer)} messages) ---"] + [format_record(record) for record in buffer]
+    buffer.clear()
+
+    path = os.environ.get("SHAPE_SPRINT_LOG_FILE")
+    if file is not None:
+        file.write("\n".join(lines) + "\n")
+    elif path:
+        with open(path, "a") as log_file:
+            log_file.write("\n".join(lines) + "\n")
+    else:
+        sys.stderr.write("\n".join(lines) + "\n")
+
+
+def install_crash_dump():
+    """
+    Dumps the buffer before the usual traceback when the game crashes.
+    """
+    previous = sys.excepthook
+
+    def hook(kind, value, traceback):
+        dump(f"crash: {kind.__name__}: {value}")
+        previous(kind, value, traceback)
+
+    sys.excepthook = hook
+
+
+if os.environ.get("SHAPE_SPRINT_LOG"):
+    configure(os.environ["SHAPE_SPRINT_LOG"])
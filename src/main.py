@@ -59,8 +59,12 @@ Known Faults:
     - The cube sprite may be pushed slightly out of its locked position on rare occasions.
     - Restart after completing the level doesn't ignore checkpoints
 """
+import argparse # Import the argparse library.
 import pygame # Import the Pygame library.
+import log # Import the debug log.
 from engine import engine_instance  # Imports the engine singleton instance.
+from preload import preloader # Imports the startup asset preloader.
+from replay import Replay, ReplayPlayer, ReplayRecorder # Imports the replay classes.
 from state import OpeningMenuState # Imports the OpeningMenuState class.
 
 # Main function.
@@ -68,7 +72,22 @@ def main():
     """
     Sets the initial game state and passes control to the engine.
     """
+    parser = argparse.ArgumentParser(description="Shape Sprint") # Parse the command line.
+    parser.add_argument("--record", help="record the first level played to this replay file") # record option
+    parser.add_argument("--replay", help="play back this replay file") # replay option
+    parser.add_argument("--log", help='debug log levels, e.g. "debug" or "collision=debug,physics=info"') # log option
+    args = parser.parse_args() # parse
+
+    if args.log: # if log levels were given
+        log.configure(args.log) # set them
+    log.install_crash_dump() # dump the debug log if the game crashes
+
     engine_instance.state = OpeningMenuState(0)  # Set the initial game state.
+    preloader.start() # Decode the rest of the assets while the opening menu runs.
+    if args.record: # if recording
+        engine_instance.replay = ReplayRecorder(args.record) # record the first run
+    if args.replay: # if replaying
+        ReplayPlayer(Replay.load(args.replay), report=True).start(engine_instance) # start the replayed run, reporting desyncs when it ends
     engine_instance.run_loop()              # Pass control to the engine.
 
 # Main entry point.
@@ -27,10 +27,8 @@ Error Conditions:
     - Non-integer values for position or size parameters may result in unexpected behavior.
 Side Effects:
     - Alters Pygame display surface by rendering images and hitboxes.
-    - Updates internal acceleration and position counters as the game runs.
 Invariants:
-    - `_x` and `_y` always match `_rect.x` and `_rect.y` for consistent position tracking.
-    - `_counter` increments each frame and resets every 30 frames, controlling the acceleration rate.
+    - `_rect` of a level object stays at its world position; scrolling is applied as an offset when drawing.
 Known Faults:
     - No known faults at this time.
 """
@@ -39,10 +37,21 @@ Known Faults:
 import pygame
 
 from image import Image
-from engine import engine_instance  # Import the engine singleton instance.
+from engine import engine_instance, SCREEN_WIDTH  # Import the engine singleton instance.
 
 TILE_SIZE = 80
 
+def draw_row(image, x, y, width, target=None):
+    """
+    Repeats an image across width pixels starting at (x, y), skipping copies that are off the target.
+    """
+    target_width = SCREEN_WIDTH if target is None else target.get_width()  # Width of the surface being drawn on.
+    step = image.get_width()                                     # Width of one copy of the image.
+    first = max(0, -x // step)                                   # First copy that reaches the target.
+    last = min(-(-width // step), (target_width - x) // step + 1)  # One past the last copy on the target.
+    for column in range(first, last):                            # For each visible copy.
+        image.blit(x + column * step, y, target)                 # Blit the copy.
+
 class Object:
     """
     Objects represent visual game entities.
@@ -57,36 +66,21 @@ class Object:
         self._width = width                                                    # Store the width (pixels) of the object.
         self._height = height                                                  # Store the height (pixels) of the object.
         self._rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, width, height)  # Store the hitbox of the object.
-        self._speed = int(TILE_SIZE / 5)                                       # Movement speed.
-        self._acceleration = 0 #var for accel
-        self._counter = 0 #counter for accel
         
-    def draw(self):
+    def draw(self, offset_x=0, offset_y=0, target=None):
         """
-        Draws the object image at the position defined by its hitbox.
+        Draws the object image at the position defined by its hitbox, shifted by the camera offset.
         """
-        self._image.blit(self._rect.x, self._rect.y)  # Blit the object
+        self._draw_row(self._image, self._rect.x - offset_x, self._rect.y - offset_y, target)  # Blit the object
 
-    def draw_hitbox(self, color=(255, 0, 0)):
+    def _draw_row(self, image, x, y, target=None):
         """
-        Draws the outline of the hitbox.
+        Repeats an image across the width of the hitbox, skipping copies that are off the target.
         """
-        pygame.draw.rect(engine_instance.screen, color, self._rect, 2)  # Draw the hitbox rect.
+        draw_row(image, x, y, self._width, target)  # Blit the visible copies.
 
-    def scroll_object(self, dy):
-        """
-        Moves the object the specified number of pixels.
+    def draw_hitbox(self, color=(255, 0, 0), offset_x=0, offset_y=0):
         """
-        if self._counter == 120: # if two secs pass
-            self._acceleration += 1 #increment accel
-            self._counter = 0 #reset coiuunter
-        self._counter += 1 #increment couner
-
-        self._rect.x -= self._speed + self._acceleration  # move the object left.  
-        self._rect.y -= dy # move the object vertically
-
-    def move_x(self, x):
-        """
-        Shifts the objects vertically.
+        Draws the outline of the hitbox.
         """
-        self._rect.x += x  # Move x coord
+        pygame.draw.rect(engine_instance.screen, color, self._rect.move(-offset_x, -offset_y), 2)  # Draw the hitbox rect.
@@ -0,0 +1,116 @@
+"""
+preload.py
+Description:
+    Decodes every image and sound under assets/ on a background thread at startup, so states built
+    later find their assets already in the shared caches.
+Created:
+    Oct 17, 2026
+Preconditions:
+    The Pygame library and mixer are initialized before start is called.
+Postconditions:
+    Once done, every manifest image is decoded in texture_cache, every sound effect is in sound_bank,
+    and every music track has been read into memory by audio.read_music.
+Error Conditions:
+    A file that fails to load is recorded in failed and skipped; it will fail again when a state loads it.
+Side Effects:
+    Runs a daemon thread while loading.
+Invariants:
+    The worker only decodes; images are converted to the display format on the main thread by their first load.
+Known Faults:
+    None.
+"""
+
+import os
+import threading
+
+import pygame
+
+from audio import MUSIC_TRACKS, read_music
+from image import texture_cache
+from sound_effect import sound_bank
+
+ASSET_DIR = "assets"                      # Directory the manifest is built from.
+IMAGE_EXTENSIONS = (".png", ".jpg", ".bmp")  # Files decoded into texture_cache.
+SOUND_EXTENSIONS = (".ogg", ".wav")          # Files decoded into sound_bank.
+
+
+def build_manifest(directory=ASSET_DIR):
+    """
+    Returns the sorted paths of the images and sounds directly under directory.
+    Subdirectories hold working copies the game never loads, so they are left out.
+    """
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.lower().endswith(IMAGE_EXTENSIONS + SOUND_EXTENSIONS):
+            paths.append(path)
+    return paths
+
+
+class AssetPreloader:
+    """
+    AssetPreloader decodes a manifest of assets into the shared caches on a worker thread.
+    """
+    def __init__(self, manifest=None):
+        """
+        Initializes an AssetPreloader. manifest defaults to build_manifest().
+        """
+        self._manifest = manifest    # Paths to load, or None to build the manifest on start.
+        self._thread = None          # Worker thread, once started.
+        self.total = 0               # Number of files in the manifest.
+        self.loaded = 0              # Number of files handled so far.
+        self.failed = []             # (path, error) for every file that could not be loaded.
+
+    def start(self):
+        """
+        Starts loading on a worker thread. Does nothing if loading has already started.
+        """
+        if self._thread is not None:
+            return
+
+        manifest = self._manifest if self._manifest is not None else build_manifest()
+        self.total = len(manifest)
+        self._thread = threading.Thread(target=self._run, args=(manifest,), name="asset-preloader", daemon=True)
+        self._thread.start()
+
+    def _run(self, manifest):
+        """
+        Decodes each file in the manifest into its cache.
+        """
+        music = {os.path.normpath(track) for track in MUSIC_TRACKS}
+        for path in manifest:
+            try:
+                if os.path.normpath(path) in music:
+                    read_music(path)
+                elif path.lower().endswith(SOUND_EXTENSIONS):
+                    if pygame.mixer.get_init():
+                        sound_bank.load(path)
+                else:
+                    texture_cache.preload(path)
+            except (pygame.error, OSError) as error:
+                self.failed.append((path, error))
+            self.loaded += 1
+
+    def progress(self):
+        """
+        Returns the fraction of the manifest handled so far, from 0 to 1.
+        """
+        return self.loaded / self.total if self.total else 1.0
+
+    def done(self):
+        """
+        Returns whether every file has been handled (or loading never started).
+        """
+        return self._thread is None or not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until loading finishes or timeout seconds pass. Returns whether loading finished.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done()
+
+
+# Global AssetPreloader instance.
+preloader = AssetPreloader()
@@ -0,0 +1,146 @@
+"""
+profiler.py
+Description:
+    Times each phase of a frame, counts per-frame work (blits, collision candidates), and shows the
+    results as a toggleable overlay or streams them to a CSV or JSONL trace file.
+Created:
+    Oct 17, 2026
+Preconditions:
+    The Pygame font module is initialized before the overlay is drawn.
+    Trace paths end in .csv or .jsonl.
+Postconditions:
+    Each completed frame is added to the profiler history and written to the trace, if one is open.
+Error Conditions:
+    open_trace raises a ValueError for an unknown trace extension.
+Side Effects:
+    Writes one line per frame to the trace file while it is open.
+Invariants:
+    frame_counters only holds counts for the frame in progress.
+Known Faults:
+    None.
+"""
+
+import csv
+import json
+import time
+from collections import Counter, deque
+
+import pygame
+
+SECTIONS = ("events", "update", "draw", "flip", "tick")  # Phases of a frame, in order.
+TRACE_FIELDS = ["frame", "state", "level", "column", "objects"] + \
+    [section + "_ms" for section in SECTIONS] + ["frame_ms", "steps", "blits", "queries", "candidates", "full_redraws", "dirty_rects"]
+
+# Work done during the frame in progress. Hot paths add to this directly.
+frame_counters = Counter()
+
+
+class FrameProfiler:
+    """
+    FrameProfiler records how long each phase of a frame takes and what work it did.
+    """
+    def __init__(self, history=120):
+        """
+        Initializes a FrameProfiler that keeps the last history frames.
+        """
+        self.show_overlay = False            # Draw the overlay on top of each frame.
+        self.frame = 0                       # Number of frames completed.
+        self._history = deque(maxlen=history)  # Most recent frame records.
+        self._times = {}                     # Section times (ms) for the frame in progress.
+        self._frame_start = 0                # When the frame in progress started.
+        self._lap_start = 0                  # When the current section started.
+        self._trace_file = None              # Open trace file, if any.
+        self._trace_writer = None            # CSV writer for CSV traces.
+        self._font = None                    # Overlay font, created on first use.
+
+    def begin_frame(self):
+        """
+        Starts timing a new frame and clears the frame counters.
+        """
+        self._frame_start = self._lap_start = time.perf_counter()
+        self._times = {}
+        frame_counters.clear()
+
+    def lap(self, section):
+        """
+        Records the time since the previous lap as section.
+        """
+        now = time.perf_counter()
+        self._times[section] = (now - self._lap_start) * 1000
+        self._lap_start = now
+
+    def end_frame(self, state):
+        """
+        Completes the frame, adding it to the history and the trace.
+        """
+        record = {"frame": self.frame, "state": type(state).__name__}
+        record.update(state.stats())
+        for section in SECTIONS:
+            record[section + "_ms"] = round(self._times.get(section, 0.0), 4)
+        record["frame_ms"] = round((time.perf_counter() - self._frame_start) * 1000, 4)
+        record.update(frame_counters)
+
+        self._history.append(record)
+        self.frame += 1
+
+        if self._trace_writer is not None:
+            self._trace_writer.writerow(record)
+        elif self._trace_file is not None:
+            self._trace_file.write(json.dumps(record) + "\n")
+
+    def open_trace(self, path):
+        """
+        Starts streaming frame records to path as CSV or JSONL, depending on its extension.
+        """
+        if not path.endswith((".csv", ".jsonl")):
+            raise ValueError(f"trace file must end in .csv or .jsonl: {path}")
+
+        self.close_trace()
+        self._trace_file = open(path, "w", newline="", buffering=1)
+        if path.endswith(".csv"):
+            self._trace_writer = csv.DictWriter(self._trace_file, TRACE_FIELDS, extrasaction="ignore")
+            self._trace_writer.writeheader()
+
+    def close_trace(self):
+        """
+        Stops streaming frame records.
+        """
+        if self._trace_file is not None:
+            self._trace_file.close()
+        self._trace_file = None
+        self._trace_writer = None
+
+    def averages(self):
+        """
+        Returns the mean of every numeric field over the recorded history.
+        """
+        totals = Counter()
+        for record in self._history:
+            for key, value in record.items():
+                if isinstance(value, (int, float)) and key != "frame":
+                    totals[key] += value
+        count = max(1, len(self._history))
+        return {key: value / count for key, value in totals.items()}
+
+    def draw_overlay(self, surface):
+        """
+        Draws the averaged frame timings and counters in the top-left corner of surface.
+        """
+        if self._font is None:
+            self._font = pygame.font.Font(None, 24)
+
+        averages = self.averages()
+        latest = self._history[-1] if self._history else {}
+        frame_ms = averages.get("frame_ms", 0)
+        lines = [
+            f"{latest.get('state', '')}  {1000 / frame_ms if frame_ms else 0:.0f} fps  {frame_ms:.2f} ms",
+            "  ".join(f"{section} {averages.get(section + '_ms', 0):.2f}" for section in SECTIONS),
+            f"steps {averages.get('steps', 0):.2f}  objects {latest.get('objects', 0)}  blits {averages.get('blits', 0):.1f}  "
+            f"candidates {averages.get('candidates', 0):.1f}  column {latest.get('column', '-')}",
+        ]
+
+        background = pygame.Surface((560, 24 * len(lines) + 8), pygame.SRCALPHA)
+        background.fill((0, 0, 0, 160))
+        surface.blit(background, (4, 4))
+        for index, line in enumerate(lines):
+            surface.blit(self._font.render(line, True, (255, 255, 255)), (10, 8 + index * 24))
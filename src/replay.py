@@ -0,0 +1,249 @@
+"""
+replay.py
+Description:
+    Records the per-update keyboard actions of a GameState run, along with the level, startpoint, and
+    world state after each update, into a compact replay file, and plays replay files back with
+    determinism checks.
+Created:
+    Oct 17, 2026
+Preconditions:
+    - The engine calls before_update and after_update around every state update (Engine.update_state).
+    - Replay files were written by this module with the same REPLAY_VERSION.
+Postconditions:
+    - A recorder writes its replay once the recorded run reaches a GameOverState or finish is called.
+    - A player reports every update where the world state differs from the recording.
+    - A reporting player prints the number of desynced updates and the first one when the replayed run ends.
+Error Conditions:
+    - Replay.load raises a ValueError for files that are not replays or have another version.
+    - A strict player raises ReplayDesync at the first world state mismatch.
+Side Effects:
+    - A ReplayPlayer swaps the engine's keyboard for a ReplayKeyboard while its run is being replayed.
+Invariants:
+    - One replay frame is recorded for every GameState update, in order.
+Known Faults:
+    - Only the first GameState run seen by a recorder is recorded.
+    - Pause menu frames are not recorded, so playback of a paused run waits at the pause menu for real input.
+"""
+
+import struct
+
+from keyboard import Keyboard
+from state import GameState, GameOverState
+
+ACTIONS = ("up", "down", "left", "right", "select", "esc")  # Recorded actions, one bit each.
+REPLAY_MAGIC = b"SSRP"
+REPLAY_VERSION = 1
+HEADER = struct.Struct("<4sBBhhI")  # magic, version, level id, start x, start y, frame count
+FRAME = struct.Struct("<Biiiib??")  # action bits, then the world state below
+STATE_FIELDS = ("camera x", "camera y", "cube x", "cube y", "gravity", "jumping", "on ground")
+
+
+def world_state(game):
+    """
+    Returns the world state of a GameState that replays record after every update.
+    The cube stays near the same spot on screen for most of a run, so the camera offset is what tracks progress.
+    """
+    camera = game._level._camera
+    rect = game._cube._rect
+    return (camera.offset_x, camera.offset_y, rect.x, rect.y, game._gravity, game.is_jumping, game.is_on_ground)
+
+
+def describe_mismatch(frame, expected, actual):
+    """
+    Returns a line naming the world state fields that differ from the recording on a frame.
+    """
+    fields = ", ".join(f"{name} {want} != {got}" for name, want, got in zip(STATE_FIELDS, expected, actual) if want != got)
+    return f"frame {frame}: {fields} (recorded != replayed)"
+
+
+class ReplayDesync(Exception):
+    """
+    Raised by a strict ReplayPlayer when the world state leaves the recorded path.
+    """
+
+
+class Replay:
+    """
+    A Replay stores a level, a startpoint, and the actions and resulting world state of every update.
+    """
+    def __init__(self, level_id, startpoint, frames=None):
+        """
+        Initializes a Replay. frames is a list of (action bits,) + world_state tuples.
+        """
+        self.level_id = level_id
+        self.startpoint = list(startpoint)
+        self.frames = frames if frames is not None else []
+
+    def save(self, path):
+        """
+        Writes the replay to path.
+        """
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.level_id,
+                                   self.startpoint[0], self.startpoint[1], len(self.frames)))
+            file.write(b"".join(FRAME.pack(*frame) for frame in self.frames))
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a replay from path.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, level_id, start_x, start_y, count = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+
+        body = data[HEADER.size:HEADER.size + count * FRAME.size]
+        return Replay(level_id, [start_x, start_y], list(FRAME.iter_unpack(body)))
+
+
+class ReplayRecorder:
+    """
+    ReplayRecorder records the first GameState run it sees and saves it when the run ends.
+    """
+    def __init__(self, path):
+        """
+        Initializes a ReplayRecorder that saves to path.
+        """
+        self._path = path
+        self._game = None      # GameState being recorded.
+        self._replay = None    # Replay being built.
+        self._bits = None      # Action bits for the update in progress, or None if it isn't recorded.
+        self.finished = False  # Whether the replay has been saved.
+
+    def before_update(self, engine):
+        """
+        Captures the actions seen by the update that is about to run.
+        """
+        self._bits = None
+        if self.finished:
+            return
+
+        if self._game is None and isinstance(engine.state, GameState):
+            self._game = engine.state
+            self._replay = Replay(self._game._level.id, self._game._startpoint)
+
+        if engine.state is self._game and self._game is not None:
+            self._bits = sum(1 << bit for bit, action in enumerate(ACTIONS) if engine.keyboard.is_key_down(action))
+
+    def after_update(self, engine):
+        """
+        Records the world state after the update, and saves once the run is over.
+        """
+        if self._bits is not None:
+            self._replay.frames.append((self._bits,) + world_state(self._game))
+
+        if self._game is not None and isinstance(engine.state, GameOverState):
+            self.finish()
+
+    def finish(self):
+        """
+        Saves the replay, if anything was recorded.
+        """
+        if not self.finished and self._replay is not None:
+            self._replay.save(self._path)
+            self.finished = True
+
+
+class ReplayKeyboard(Keyboard):
+    """
+    A Keyboard that reports the actions of the current replay frame instead of real key presses.
+    """
+    def __init__(self):
+        """
+        Initializes a ReplayKeyboard with no actions down.
+        """
+        super().__init__()
+        self.bits = 0
+
+    def is_key_down(self, action):
+        """
+        Checks if an action is down in the current replay frame.
+        """
+        return action in ACTIONS and bool(self.bits & (1 << ACTIONS.index(action)))
+
+
+class ReplayPlayer:
+    """
+    ReplayPlayer feeds a Replay into a new GameState and checks the world follows the recorded path.
+    """
+    def __init__(self, replay, strict=False, report=False):
+        """
+        Initializes a ReplayPlayer. A strict player raises ReplayDesync at the first mismatch.
+        A reporting player prints a summary of the mismatches when the replayed run ends.
+        """
+        self._replay = replay
+        self._strict = strict
+        self._report = report
+        self._keyboard = ReplayKeyboard()
+        self._game = None       # GameState being replayed.
+        self._real_keyboard = None  # Keyboard to hand back when not replaying.
+        self._playing = False   # Whether the update in progress is replaying a frame.
+        self.frame = 0          # Index of the next replay frame.
+        self.mismatches = []    # (frame, expected state, actual state) for every desynced update.
+        self.reported = False   # Whether the summary has been printed.
+
+    def start(self, engine):
+        """
+        Starts the replayed run on engine. Returns the new GameState.
+        """
+        self._game = GameState(self._replay.level_id, self._replay.startpoint)
+        self._real_keyboard = engine.keyboard
+        engine.keyboard = self._keyboard
+        engine.state = self._game
+        engine.replay = self
+        return self._game
+
+    def done(self):
+        """
+        Returns whether every replay frame has been played.
+        """
+        return self.frame >= len(self._replay.frames)
+
+    def before_update(self, engine):
+        """
+        Presses the actions of the next replay frame, or hands the real keyboard back outside the replayed run.
+        """
+        self._playing = engine.state is self._game and not self.done()
+        if self._playing:
+            self._keyboard.bits = self._replay.frames[self.frame][0]
+            engine.keyboard = self._keyboard
+        else:
+            engine.keyboard = self._real_keyboard
+
+    def after_update(self, engine):
+        """
+        Compares the world state with the recording, and reports once the replayed run is over.
+        """
+        if not self._playing:
+            return
+
+        expected = self._replay.frames[self.frame][1:]
+        actual = world_state(self._game)
+        if actual != expected:
+            self.mismatches.append((self.frame, expected, actual))
+            if self._strict:
+                raise ReplayDesync(describe_mismatch(self.frame, expected, actual))
+        self.frame += 1
+
+        if self.done() or isinstance(engine.state, GameOverState):
+            self.finish()
+
+    def summary(self, limit=10):
+        """
+        Returns lines giving the number of desynced updates and describing the first limit of them.
+        """
+        lines = [f"{len(self.mismatches)} desynced frames"]
+        for frame, expected, actual in self.mismatches[:limit]:
+            lines.append("  " + describe_mismatch(frame, expected, actual))
+        return lines
+
+    def finish(self):
+        """
+        Prints the summary once, if the player reports.
+        """
+        if self._report and not self.reported:
+            self.reported = True
+            print("\n".join(self.summary(limit=1)))
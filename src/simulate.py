@@ -0,0 +1,98 @@
+"""
+simulate.py
+Description:
+    Runs a level headlessly, stepping GameState as fast as the CPU allows, and reports how the run ended.
+Created:
+    Oct 17, 2026
+Preconditions:
+    - Must be run from the src directory so asset paths resolve.
+    - The level passed with --level exists in level.levels.
+Postconditions:
+    - Prints the end state, the number of frames simulated, and the simulation speed.
+    - With --replay, also prints the number of frames where the world state left the recorded path,
+      and exits with status 1 if there were any.
+Error Conditions:
+    - Raises a KeyError if the level does not exist.
+Side Effects:
+    - Sets SHAPE_SPRINT_HEADLESS=1 before the engine is imported.
+Invariants:
+    - No window is opened and no audio is played.
+Known Faults:
+    - Without --replay the cube never jumps, so most runs end at the first obstacle.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ["SHAPE_SPRINT_HEADLESS"] = "1"  # Must be set before the engine is imported.
+
+from engine import engine_instance  # Imports the engine singleton instance.
+from level import GROUND_LEVEL      # Imports the ground level row.
+from replay import Replay, ReplayPlayer  # Imports the replay classes.
+from state import GameState         # Imports the GameState class.
+
+
+def simulate(level_id, startpoint=None, max_frames=60 * 60 * 5):
+    """
+    Simulates a level from startpoint. Returns the final state, frames stepped, and elapsed seconds.
+    """
+    if startpoint is None:
+        startpoint = [0, GROUND_LEVEL]
+
+    game = GameState(level_id, startpoint)  # Start the level.
+    engine_instance.state = game            # Hand it to the engine.
+
+    start = time.perf_counter()
+    frames = engine_instance.run_headless(max_frames, stop=lambda state: state is not game)
+    elapsed = time.perf_counter() - start
+
+    return engine_instance.state, frames, elapsed
+
+
+def simulate_replay(path):
+    """
+    Replays a recorded run. Returns the final state, frames stepped, elapsed seconds, and the player.
+    """
+    replay = Replay.load(path)
+    player = ReplayPlayer(replay)
+    game = player.start(engine_instance)
+
+    start = time.perf_counter()
+    frames = engine_instance.run_headless(len(replay.frames), stop=lambda state: state is not game)
+    elapsed = time.perf_counter() - start
+
+    return engine_instance.state, frames, elapsed, player
+
+
+# Main function.
+def main():
+    """
+    Parses the command line and runs the simulation.
+    """
+    parser = argparse.ArgumentParser(description="Simulate a Shape Sprint level headlessly.")
+    parser.add_argument("--level", type=int, default=4, help="level id to simulate")
+    parser.add_argument("--start", type=int, default=0, help="tile column to start from")
+    parser.add_argument("--frames", type=int, default=60 * 60 * 5, help="most frames to simulate")
+    parser.add_argument("--replay", help="replay file to simulate instead of --level/--start")
+    args = parser.parse_args()
+
+    if args.replay:
+        state, frames, elapsed, player = simulate_replay(args.replay)
+        label = args.replay
+    else:
+        state, frames, elapsed = simulate(args.level, [args.start, GROUND_LEVEL], args.frames)
+        label = f"level {args.level}"
+    print(f"{label}: {type(state).__name__} after {frames} frames "
+          f"in {elapsed:.3f}s ({frames / elapsed if elapsed else 0:.0f} frames/s)")
+
+    if args.replay:
+        print("\n".join(player.summary()))
+        if player.mismatches:
+            sys.exit(1)
+
+
+# Main entry point.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+solver.py
+Description:
+    Searches every level for a run that beats it, stepping the real GameState physics headlessly with
+    jump inputs chosen frame by frame. Reports whether each level is beatable, the run with the fewest
+    jump frames, and the window of frames each of its jumps could start on and still win.
+Created:
+    Oct 17, 2026
+Preconditions:
+    - Must be run from the src directory so level files resolve.
+    - GameState updates are deterministic: the same inputs from the same snapshot give the same frame.
+Postconditions:
+    - Prints one report per level and exits with status 1 if any level could not be beaten.
+    - With --save, writes the winning run of each level as a replay that simulate.py --replay can check.
+Error Conditions:
+    - Raises a KeyError if a level passed with --level does not exist.
+Side Effects:
+    - Sets SHAPE_SPRINT_HEADLESS=1 before the engine is imported, in this process and every worker.
+    - Swaps the engine's keyboard for a ReplayKeyboard in each worker.
+Invariants:
+    - The search is breadth-first by frame, so the first frame a level is won on is the earliest possible.
+    - A frame state is expanded at most once; later arrivals at a state already seen are pruned.
+Known Faults:
+    - Jumps are attributed to the first spikes or platform ahead of the cube when they start, which is
+      not always the obstacle the jump was for.
+    - Windows are measured one jump at a time with every other jump left where it was.
+    - Among runs with the fewest jump frames the search keeps the first one it reaches, and it expands
+      runs that have not jumped yet first, so each jump in the reported run starts on the last frame of
+      its window. The window, not the chosen frame, shows how much timing a jump allows.
+    - Only jumps pressed on the ground and held for consecutive frames are searched, so a level beatable only
+      by pressing again in midair is reported as not beatable.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+os.environ["SHAPE_SPRINT_HEADLESS"] = "1"  # Must be set before the engine is imported.
+
+from engine import engine_instance  # Imports the engine singleton instance.
+from level import GROUND_LEVEL, KIND_PLATFORM, KIND_SPIKES, levels  # Imports the level kinds and specifications.
+from object import TILE_SIZE        # Imports the tile size.
+from replay import ACTIONS, Replay, ReplayKeyboard, world_state  # Imports the replay format, keyboard and frame state.
+from state import GameState, GameOverState  # Imports the game states.
+
+JUMP = 1 << ACTIONS.index("up")     # Action bits of a frame with the jump key held.
+MAX_FRAMES = 60 * 60 * 5            # Most frames searched per level.
+MAX_SHIFT = 30                      # Most frames a jump is shifted each way when measuring its window.
+OBSTACLE_KINDS = {KIND_SPIKES: "spikes", KIND_PLATFORM: "platform"}  # Kinds jumps are attributed to.
+
+WIN = 0   # GameOverState endstate of a won run.
+LOSS = 1  # GameOverState endstate of a lost run.
+
+
+class Run:
+    """
+    A Run steps one GameState with chosen inputs, and saves and loads whole frames so a search can branch.
+    """
+    def __init__(self, level_id):
+        """
+        Initializes a Run of level_id from its first column.
+        """
+        self.level_id = level_id
+        self.game = GameState(level_id, [0, GROUND_LEVEL])  # The run being stepped.
+        self.keyboard = ReplayKeyboard()                    # Presses the chosen inputs.
+        engine_instance.keyboard = self.keyboard
+
+    def save(self):
+        """
+        Returns the current frame as a GameState snapshot.
+        """
+        return self.game.snapshot()
+
+    def load(self, frame):
+        """
+        Resumes the run from a frame returned by save.
+        """
+        self.game.restore(frame)
+
+    def key(self):
+        """
+        Returns a hashable summary of everything the next update depends on, for pruning repeated states.
+        The camera follows the cube vertically, and collisions only compare the two, so the cube is keyed
+        by its world position rather than by its screen position and the camera offset separately.
+        """
+        game = self.game
+        camera = game._level._camera
+        rect = game._cube._rect
+        return (rect.x + camera.offset_x, rect.y + camera.offset_y, camera._acceleration, camera._counter,
+                frozenset(game._level.snapshot().activated), game._gravity,
+                game._vertical_velocity, game.is_jumping, game.is_on_ground, game.jump_frames,
+                tuple((tile.view._row, tile.rect.x, tile.rect.y) for tile in game._objects_collided))
+
+    def can_jump(self, held):
+        """
+        Returns whether the search should try holding the jump key on the next update, given whether it was
+        held on the last one. Jumps are pressed on the ground and held for consecutive frames until released;
+        holding longer than a jump can use, or pressing again in midair, is not explored.
+        """
+        game = self.game
+        if held:
+            return game.is_jumping and game.jump_frames < 5
+        return game.is_on_ground and not game.is_jumping
+
+    def step(self, bits):
+        """
+        Runs one update with the given action bits. Returns WIN or LOSS if the run ended, otherwise None.
+        """
+        engine_instance.state = self.game
+        self.keyboard.bits = bits
+        self.game.update()
+        state = engine_instance.state
+        if state is self.game:
+            return None
+        return state._endstate if isinstance(state, GameOverState) else LOSS
+
+    def world_left(self):
+        """
+        Returns the cube's left edge in world pixels.
+        """
+        return self.game._cube._rect.x + self.game._level._camera.offset_x
+
+
+def jump_runs(presses):
+    """
+    Returns the (first frame, length) of each run of consecutive jump frames in a sorted list of frames.
+    """
+    runs = []
+    for frame in presses:
+        if runs and runs[-1][0] + runs[-1][1] == frame:
+            runs[-1][1] += 1
+        else:
+            runs.append([frame, 1])
+    return [tuple(run) for run in runs]
+
+
+def format_runs(presses):
+    """
+    Returns the jump frames as "first+length" runs, e.g. "12+5 40+2".
+    """
+    return " ".join(f"{first}+{length}" for first, length in jump_runs(presses)) or "(no jumps)"
+
+
+def search(level_id, max_frames=MAX_FRAMES):
+    """
+    Searches level_id breadth-first by frame for the earliest win with the fewest jump frames.
+    Returns a result dict.
+    """
+    run = Run(level_id)
+    frontier = [(0, None, run.save(), 0)]  # (jump frames, jump trace, frame, last bits) per distinct state.
+    seen = {run.key() + (0,)}              # States already expanded.
+    expanded = pruned = 0
+    start = time.perf_counter()
+
+    for frame in range(max_frames):
+        layer = {}    # Map of state key to (jump frames, jump trace, frame, bits) for the next frame.
+        wins = []     # (jump frames, jump trace) of runs won on this frame.
+        for presses, trace, saved, held in frontier:
+            run.load(saved)
+            choices = (0, JUMP) if run.can_jump(held) else (0,)
+            for bits in choices:
+                if bits != choices[0]:
+                    run.load(saved)
+                expanded += 1
+                cost, path = (presses + 1, (frame, trace)) if bits else (presses, trace)
+                outcome = run.step(bits)
+                if outcome == WIN:
+                    wins.append((cost, path))
+                elif outcome is None:
+                    key = run.key() + (bits,)
+                    if key in seen or (key in layer and layer[key][0] <= cost):
+                        pruned += 1
+                    else:
+                        layer[key] = (cost, path, run.save(), bits)
+
+        if wins:
+            cost, path = min(wins, key=lambda win: win[0])
+            presses = []
+            while path is not None:
+                presses.append(path[0])
+                path = path[1]
+            return {"level": level_id, "beatable": True, "frames": frame + 1, "presses": presses[::-1],
+                    "expanded": expanded, "pruned": pruned, "elapsed": time.perf_counter() - start}
+        if not layer:
+            break
+
+        seen.update(layer)
+        frontier = sorted(layer.values(), key=lambda entry: entry[0])
+
+    return {"level": level_id, "beatable": False, "frames": frame + 1, "presses": [],
+            "expanded": expanded, "pruned": pruned, "elapsed": time.perf_counter() - start}
+
+
+def record(level_id, presses, frames):
+    """
+    Plays a jump trace from the start of level_id. Returns a Replay of it.
+    """
+    run = Run(level_id)
+    replay = Replay(level_id, [0, GROUND_LEVEL])
+    jumps = set(presses)
+    for frame in range(frames):
+        bits = JUMP if frame in jumps else 0
+        outcome = run.step(bits)
+        replay.frames.append((bits,) + world_state(run.game))
+        if outcome is not None:
+            break
+    return replay
+
+
+# Reference runs cached per worker process: (level id, jump frames) -> (run, saved frames, state keys).
+_references = {}
+
+
+def reference(level_id, presses, frames):
+    """
+    Plays a winning jump trace once, saving every frame and its state key so window probes can branch from it.
+    """
+    cache_key = (level_id, tuple(presses))
+    if cache_key not in _references:
+        run = Run(level_id)
+        jumps = set(presses)
+        saved, keys = [run.save()], [run.key()]
+        for frame in range(frames - 1):
+            run.step(JUMP if frame in jumps else 0)
+            saved.append(run.save())
+            keys.append(run.key())
+        _references.clear() # one reference per worker at a time
+        _references[cache_key] = (run, saved, keys)
+    return _references[cache_key]
+
+
+def wins_with(run, saved, keys, jumps, first, last):
+    """
+    Returns whether the run still wins when frames first to last are played with the given jump frames.
+    Frames before first match the reference; once the state rejoins the reference the rest of the run does too.
+    """
+    run.load(saved[first])
+    for frame in range(first, MAX_FRAMES):
+        outcome = run.step(JUMP if frame in jumps else 0)
+        if outcome is not None:
+            return outcome == WIN
+        if last <= frame < len(keys) - 1 and run.key() == keys[frame + 1]:
+            return True
+    return False
+
+
+def jump_window(level_id, presses, frames, index):
+    """
+    Returns a dict describing jump index of a winning trace: when it starts, the obstacle ahead of it, and
+    the earliest and latest frames it could start on with every other jump unchanged.
+    """
+    run, saved, keys = reference(level_id, presses, frames)
+    runs = jump_runs(presses)
+    first, length = runs[index]
+    earliest = runs[index - 1][0] + runs[index - 1][1] + 1 if index else 0   # Stay clear of the jump before.
+    latest = runs[index + 1][0] - length - 1 if index + 1 < len(runs) else frames - length  # And the one after.
+    others = set(presses) - set(range(first, first + length))
+
+    window = []  # The furthest working start each way, and whether the search stopped at MAX_SHIFT.
+    for direction in (-1, 1):
+        shift = 0
+        while shift < MAX_SHIFT:
+            moved = first + direction * (shift + 1)
+            if not earliest <= moved <= latest:
+                break
+            jumps = others | set(range(moved, moved + length))
+            if not wins_with(run, saved, keys, jumps, min(first, moved), max(first, moved) + length):
+                break
+            shift += 1
+        window.append((first + direction * shift, shift == MAX_SHIFT))
+
+    # Find the first obstacle ahead of the cube as the jump starts.
+    run.load(saved[first])
+    cube_left = run.world_left()
+    store = run.game._level._store
+    ahead = [row for row in range(len(store)) if store.kind[row] in OBSTACLE_KINDS and store.x[row] > cube_left]
+    obstacle = None
+    if ahead:
+        row = min(ahead, key=lambda row: (store.x[row], store.y[row]))
+        obstacle = (OBSTACLE_KINDS[store.kind[row]], store.x[row] // TILE_SIZE, store.y[row] // TILE_SIZE)
+
+    return {"frame": first, "length": length, "obstacle": obstacle, "earliest": window[0][0], "latest": window[1][0],
+            "open_early": window[0][1], "open_late": window[1][1]}
+
+
+def _window_task(task):
+    """
+    Pool entry point for jump_window.
+    """
+    return task[0], task[3], jump_window(*task)
+
+
+def solve(level_ids, workers=None, max_frames=MAX_FRAMES):
+    """
+    Searches each level on a process pool, then measures the window of every winning jump on the same pool.
+    Returns the result dicts in level order, each with a "jumps" list.
+    """
+    # Workers are spawned rather than forked, since this process has already started SDL's threads.
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        results = pool.starmap(search, [(level_id, max_frames) for level_id in level_ids])
+        tasks = [(result["level"], result["presses"], result["frames"], index)
+                 for result in results if result["beatable"] for index in range(len(jump_runs(result["presses"])))]
+        jumps = {}
+        for level_id, index, jump in pool.imap(_window_task, tasks, chunksize=4):
+            jumps.setdefault(level_id, []).append(jump)
+
+        # Let the workers exit on their own. SDL turns the SIGTERM that leaving the block sends into a
+        # quit event, so a worker that is still running would never stop.
+        pool.close()
+        pool.join()
+
+    for result in results:
+        result["jumps"] = jumps.get(result["level"], [])
+    return results
+
+
+def report(result):
+    """
+    Prints a level's result.
+    """
+    level_id = result["level"]
+    print(f"level {level_id}: {'beatable' if result['beatable'] else 'NOT beatable'} "
+          f"({result['expanded']} states expanded, {result['pruned']} pruned, {result['elapsed']:.2f}s)")
+    if not result["beatable"]:
+        print(f"  no run survives past frame {result['frames']}")
+        return
+
+    print(f"  won on frame {result['frames']} with {len(result['presses'])} jump frames: {format_runs(result['presses'])}")
+    for jump in result["jumps"]:
+        obstacle = "nothing ahead" if jump["obstacle"] is None else "%s at column %d, row %d" % jump["obstacle"]
+        width = jump["latest"] - jump["earliest"] + 1
+        more = "+" if jump["open_early"] or jump["open_late"] else ""  # The window may be wider than measured.
+        tight = "  <- frame-perfect" if width == 1 else ""
+        print(f"  frame {jump['frame']:5d} +{jump['length']}  {obstacle:<28} "
+              f"starts {jump['earliest']}-{jump['latest']} ({width}{more} frame{'s' if width > 1 else ''}){tight}")
+
+
+# Main function.
+def main():
+    """
+    Parses the command line, solves the levels, and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Check that Shape Sprint levels can be beaten.")
+    parser.add_argument("--level", type=int, action="append", help="level id to solve (repeatable; default: every level)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--frames", type=int, default=MAX_FRAMES, help="most frames to search per level")
+    parser.add_argument("--save", metavar="DIR", help="write each winning run to DIR/level<id>.rep")
+    args = parser.parse_args()
+
+    level_ids = args.level if args.level else sorted(levels)
+    for level_id in level_ids:
+        if level_id not in levels:
+            raise KeyError(f"level {level_id} does not exist")
+
+    results = solve(level_ids, args.workers, args.frames)
+    for result in results:
+        report(result)
+        if args.save and result["beatable"]:
+            os.makedirs(args.save, exist_ok=True)
+            path = os.path.join(args.save, f"level{result['level']}.rep")
+            record(result["level"], result["presses"], result["frames"]).save(path)
+            print(f"  saved {path}")
+
+    if not all(result["beatable"] for result in results):
+        sys.exit(1)
+
+
+# Main entry point.
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 """
 sound_effect.py
 Description:
-    Provides a wrapper around a pygame.sound object.
+    Provides a wrapper around a pygame.sound object and a shared sound bank that plays effects
+    through a fixed pool of reserved mixer channels.
 Programmers:
     Steve Gan
     Sean Hammell
@@ -21,33 +22,140 @@ Postconditions:
 Error Conditions:
     __init__ will raise an exception if the image file is invalid or missing.
 Side Effects:
-    None.
+    Decoded sounds stay resident in sound_bank for the life of the process.
+    The first effect played reserves CHANNEL_POOL mixer channels for the bank.
 Invariants:
-    None.
+    Every sound in the bank plays at sfx_vol.
+    Effects never play on more than CHANNEL_POOL channels; a new effect cuts off the oldest when all are busy.
 Known Faults:
     None.
 """
 
+import os
+import threading
+
 import pygame
 
+from engine import engine_instance  # Import the engine singleton instance.
+
 sfx_vol = .05
 
+CHANNEL_POOL = 4  # Mixer channels reserved for sound effects.
+
+
+class SoundBank:
+    """
+    Decodes each sound file once, shares one SoundEffect per file, and plays them through a channel pool.
+    """
+    def __init__(self, channels=CHANNEL_POOL):
+        """
+        Initializes an empty SoundBank that plays through channels reserved channels.
+        """
+        # Map normalized file paths to decoded sounds and to their shared effects.
+        self._sounds = {}
+        self._effects = {}
+        self._lock = threading.Lock()
+
+        # Channel pool, reserved on first play once the mixer is up.
+        self._pool_size = channels
+        self._pool = None
+        self._next = 0
+
+        # Track how well the bank is doing.
+        self.hits = 0
+        self.misses = 0
+        self.steals = 0
+
+    def load(self, file):
+        """
+        Returns the shared sound for a sound file, decoding it on first use. Safe to call from a worker thread.
+        """
+        key = os.path.normpath(file)
+        sound = self._sounds.get(key)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        sound = pygame.mixer.Sound(file)
+        sound.set_volume(sfx_vol)
+        with self._lock:
+            return self._sounds.setdefault(key, sound)
+
+    def effect(self, file):
+        """
+        Returns the shared SoundEffect for a sound file.
+        """
+        key = os.path.normpath(file)
+        effect = self._effects.get(key)
+        if effect is None:
+            effect = self._effects[key] = SoundEffect(file)
+        return effect
+
+    def set_volume(self, volume):
+        """
+        Sets the volume of every sound in the bank.
+        """
+        with self._lock:
+            sounds = list(self._sounds.values())
+        for sound in sounds:
+            sound.set_volume(volume)
+
+    def _channels(self):
+        """
+        Returns the reserved channel pool, reserving it on first use.
+        """
+        if self._pool is None:
+            if pygame.mixer.get_num_channels() < self._pool_size:
+                pygame.mixer.set_num_channels(self._pool_size)
+            pygame.mixer.set_reserved(self._pool_size)
+            self._pool = [pygame.mixer.Channel(index) for index in range(self._pool_size)]
+        return self._pool
+
+    def play(self, sound):
+        """
+        Plays a sound on a free pooled channel, or on the one used longest ago if every channel is busy.
+        """
+        # Headless engines play no sound.
+        if engine_instance.headless:
+            return
+
+        pool = self._channels()
+        for offset in range(len(pool)):
+            index = (self._next + offset) % len(pool)
+            if not pool[index].get_busy():
+                break
+        else:
+            index = self._next
+            self.steals += 1
+        pool[index].play(sound)
+        self._next = (index + 1) % len(pool)
+
+    def stats(self):
+        """
+        Returns the bank counters as a dict.
+        """
+        return {
+            "entries": len(self._sounds),
+            "hits": self.hits,
+            "misses": self.misses,
+            "steals": self.steals,
+        }
+
 
 class SoundEffect:
     def __init__(self, file):
         """
-        Initializes a SoundEffect object.
+        Initializes a SoundEffect object. Use sound_bank.effect to share one per file.
         """
-        # Load the sound file.
-        self._sound = pygame.mixer.Sound(file)
-        self._sound.set_volume(sfx_vol)
-
+        # Fetch the shared sound for the file. Every sound in the bank plays at sfx_vol, so sharing it is safe.
+        self._sound = sound_bank.load(file)
 
     def play(self):
         """
-        Plays the SoundEffect.
+        Plays the SoundEffect on one of the bank's channels.
         """
-        pygame.mixer.Sound.play(self._sound)
+        sound_bank.play(self._sound)
 
     def update_volume(self):
         """
@@ -55,10 +163,17 @@ class SoundEffect:
         """
         self._sound.set_volume(sfx_vol)
 
+
+# Global SoundBank instance.
+sound_bank = SoundBank()
+
+
 def sfx_volume_up():
     global sfx_vol
     sfx_vol = min(sfx_vol + 0.1, 1.0)  # Cap at 1.0
+    sound_bank.set_volume(sfx_vol)     # Apply it to every loaded sound.
 
 def sfx_volume_down():
     global sfx_vol
     sfx_vol = max(sfx_vol - 0.1, 0.0)  # Minimum 0.0
+    sound_bank.set_volume(sfx_vol)     # Apply it to every loaded sound.
@@ -55,12 +55,18 @@ import pygame  # Import the Pygame library.
 import sys     # Import system-specific parameters and functions.
 import time    # Import the time module for handling delays.
 
-from image import Image                     # Import the Image class for handling images.
+import log     # Import the debug log.
+
+from image import Image, texture_cache      # Import the Image class and the shared texture cache.
+from background import BackgroundLayer      # Import the tiled background layer.
 from audio import *                         # Import audio-related functions.
-from engine import engine_instance  # Import the engine singleton instance.
-from sound_effect import SoundEffect        # Import the SoundEffect class for handling sound effects.
+from engine import engine_instance, SCREEN_WIDTH, SCREEN_HEIGHT  # Import the engine singleton instance and screen size.
+from preload import preloader               # Import the startup asset preloader.
+from text_cache import text_cache           # Import the shared font and text cache.
+from sound_effect import sound_bank         # Import the shared sound bank for sound effects.
 
 from level import *        # Import the Level class, level objects, and level specifications.
+from level_format import load_level  # Import the compiled level loader.
 from object import Object  # Import the Object class to create game entities.
 
 # State is an abstract base class. This definition is meant to give the Engine class
@@ -72,14 +78,55 @@ class State:
     def draw(self): # update
         pass # pass
 
+    def dirty_rects(self): # dirty rects
+        """
+        Returns the screen rects that changed since the state was last drawn, or None to redraw the whole screen.
+        An empty list means nothing changed.
+        """
+        return None # redraw everything
+
+    def idle_timeout(self): # idle timeout
+        """
+        Returns the most milliseconds the engine may wait for an event before updating the state again,
+        or None if the state must be updated every frame.
+        """
+        return None # update every frame
+
+    def stats(self): # stats
+        """
+        Returns extra fields describing the state for the frame profiler.
+        """
+        return {} # nothing extra
+
+BACKGROUNDS = { # background image of each level
+    0: "assets/background.png",
+    1: "assets/background2.png",
+    2: "assets/background3.png",
+    3: "assets/background4.png",
+    4: "assets/background5.png",
+}
+
+# GameSnapshot stores everything GameState needs to resume a run from an earlier frame.
+class GameSnapshot:
+    def __init__(self, level, cube, gravity, vertical_velocity, is_jumping, is_on_ground, jump_frames, startpoint, objects_collided): # init
+        self.level = level                          # LevelSnapshot of the camera and gravity inverters.
+        self.cube = cube                            # Cube position (x, y).
+        self.gravity = gravity                      # Gravity direction.
+        self.vertical_velocity = vertical_velocity  # Cube vertical velocity.
+        self.is_jumping = is_jumping                # Whether the Cube was jumping.
+        self.is_on_ground = is_on_ground            # Whether the Cube was grounded.
+        self.jump_frames = jump_frames              # Frames the jump key had been held.
+        self.startpoint = startpoint                # Startpoint at the time.
+        self.objects_collided = objects_collided    # Tiles the cube touched on the last move, handled by the next update.
+
 # GameState manages the main gameplay, handling Cube movement, collisions, and rendering.
-class GameState:
+class GameState(State):
     # Initializes GameState, setting up Cube, Level, and other parameters.
     def __init__(self, level_id = 0, startpoint=[0, GROUND_LEVEL]):
         # Initialize objects.
         self._startpoint = startpoint # startpoint var to be used w/ checkpoints
         self._cube = Cube() # Store the Cube data.
-        self._level = Level(levels[level_id], startpoint) # Store the Level data.
+        self._level = Level(load_level(level_id), startpoint) # Store the Level data.
 
         # Initialize physics.
         self._gravity = 1  # Store the gravity data.
@@ -89,8 +136,16 @@ class GameState:
         self._objects_collided = [] # Store all objects collided with
         self._surfaces_collided = [] # Store all surfaces collided with
 
+        # Map each kind of trigger to its handler. Hazards all end the run; other objects are ignored.
+        self._trigger_handlers = {
+            KIND_CHECKPOINT: self._touch_checkpoint,
+            KIND_END: self._touch_end,
+            KIND_INVERT_GRAVITY: self._touch_invert_gravity,
+            KIND_SPEED: self._touch_speed_boost,
+        }
+
          # Initialize audio.
-        self._landing_sound = SoundEffect("assets/landing_sound.wav") # landing sound
+        self._landing_sound = sound_bank.effect("assets/landing_sound.wav") # shared landing sound
         set_music("assets/music.wav")  # Set the game music.
         play_music()                     # Play the game music.
 
@@ -101,19 +156,56 @@ class GameState:
         # Load instructions asset
         #self._instructions_image = Image("assets/instructions.png")  # Load the instructions image.
         self._settings = Image("assets/settings.png")                # Load the settings image.
-        if level_id == 0:    
-            self._background_image = Image("assets/background.png")  # Load the background
-        elif level_id == 1:
-            self._background_image = Image("assets/background2.png")  # Load the background
-        elif level_id == 2:
-            self._background_image = Image("assets/background3.png")  # Load the background
-        elif level_id == 3:
-            self._background_image = Image("assets/background4.png")  # Load the background
-        elif level_id == 4:
-            self._background_image = Image("assets/background5.png")  # Load the background
-
-        self._ctr = 0 # counter
+        self._background = BackgroundLayer(BACKGROUNDS[level_id]) # Tiled background, scrolled with the level.
+
         self.jump_frames = 0 # how many frames jump key was held down for
+
+        # Take snapshots so retries restore in place instead of building a new GameState.
+        self._respawn_snapshot = self.snapshot() # Where to respawn: the startpoint, then the last checkpoint touched.
+        self._start_snapshot = self.snapshot()   # Where to restart: the first column of the level.
+        self._start_snapshot.level = LevelSnapshot(0, 0, 0, 0, set()) # The camera starts at the level origin.
+        self._start_snapshot.startpoint = [0, GROUND_LEVEL] # No checkpoint reached yet.
+
+    def snapshot(self):
+        """
+        Returns a GameSnapshot of the current frame.
+        """
+        return GameSnapshot(self._level.snapshot(), self._cube._rect.topleft, self._gravity, self._vertical_velocity,
+                            self.is_jumping, self.is_on_ground, self.jump_frames, list(self._startpoint),
+                            list(self._objects_collided))
+
+    def restore(self, snapshot):
+        """
+        Resumes the run from snapshot.
+        """
+        self._level.restore(snapshot.level) # Move the camera and reset the gravity inverters.
+        self._cube._rect.topleft = snapshot.cube # Move the cube back.
+        self._gravity = snapshot.gravity # Restore the physics.
+        self._vertical_velocity = snapshot.vertical_velocity
+        self.is_jumping = snapshot.is_jumping
+        self.is_on_ground = snapshot.is_on_ground
+        self.jump_frames = snapshot.jump_frames
+        self._startpoint = list(snapshot.startpoint) # Restore the startpoint. The background follows the level.
+        self._objects_collided = list(snapshot.objects_collided) # The next update handles them, e.g. speed boosts.
+        self._surfaces_collided = []
+        play_music() # Start the music over, as a new run would.
+
+    def respawn(self):
+        """
+        Resumes the run from the last checkpoint touched, or from where it started.
+        """
+        if log.state.info: # log the respawn
+            log.state.log(log.INFO, "respawn on level %d at %s", self._level.id, tuple(self._respawn_snapshot.startpoint))
+        self.restore(self._respawn_snapshot) # restore in place
+
+    def restart(self):
+        """
+        Restarts the run from the start of the level.
+        """
+        if log.state.info: # log the restart
+            log.state.log(log.INFO, "restart level %d", self._level.id)
+        self._respawn_snapshot = self._start_snapshot # checkpoints are forgotten
+        self.restore(self._start_snapshot) # restore in place
         
     # Updates Cube position and handles input for movement and sound control.
     def update(self):
@@ -122,35 +214,18 @@ class GameState:
         """
         if engine_instance.keyboard.is_key_down("esc"):  # If escape is pressed.
             engine_instance.state = MainMenuState(self)            # Go to the main menu
+            if log.state.info: # log the pause
+                log.state.log(log.INFO, "paused level %d", self._level.id)
 
         was_in_air = not self.is_on_ground # Track whether Cube was in the air in the last frame, for landing detection.
         
+        handlers = self._trigger_handlers # trigger handlers by object kind
         for obj in self._objects_collided:
-            if isinstance(obj, CheckpointFlag):
-                self._startpoint = [obj._base_x - 4, obj._base_y + 1]  # Update the startpoint.
-            elif isinstance(obj, EndFlag):
-                engine_instance.state = GameOverState(self._level, self._cube, self._startpoint, 0)  # The user won.
-            elif isinstance(obj, Spikes):
-                engine_instance.state = GameOverState(self._level, self._cube, self._startpoint, 1)  # The user lost.
-            elif isinstance(obj, InvertGravity): #if grav instance
-            # Handle gravity inversion.
-                if obj.activated == False: # deactivated
-                    obj.activated = True # activate
-                    if self._gravity > 0:  # If gravity is currently normal.
-                        self._gravity = -1 #grav is -1
-                        self._vertical_velocity = -2  # Small nudge upwards to ensure movement.
-                    else:  # If gravity is currently inverted.
-                        self._gravity = 1 #grav is 1
-                        self._vertical_velocity = 2  # Small nudge downwards to ensure movement.
-                    self.is_jumping = True #jumping is true
-                    self.is_on_ground = False #jumping is false
-                    print("Gravity inverted!") #test label
-            
-            
-            elif isinstance(obj, SpeedBoost): #if speed boost
-            # Handle gravity inversion.
-                    self._cube.move(self._vertical_velocity, self._gravity, self._level) #move again - doubles speed
-                    print("Speed") #print test
+            traits = obj.traits # what touching it does
+            if traits & TRAIT_HAZARD: # spikes and the like
+                self._touch_hazard(obj)
+            elif traits & TRAIT_TRIGGER: # checkpoints, flags, inverters and boosts
+                handlers[obj.kind](obj)
 
         # Handle jumping.
         if engine_instance.keyboard.is_key_down("up"): #if up
@@ -163,7 +238,8 @@ class GameState:
                 jump_direction = 1 if self._gravity > 0 else -1  # Jump direction depends on gravity.
                
                 self._vertical_velocity = jump_direction * max(self._jump_strength, self.jump_frames / 5 * self._jump_strength) #calc for var jump
-                print(self._vertical_velocity) #print velocity
+                if log.physics.debug: # log the velocity
+                    log.physics.log(log.DEBUG, "jump velocity %s", self._vertical_velocity)
         else: #else
             if self.is_jumping and self.is_on_ground:  # Reset flags when landing.
                 self.is_jumping = False  # Reset jumping state.
@@ -184,7 +260,7 @@ class GameState:
                 self.is_on_ground = False #on ground false
                 self._vertical_velocity += self._gravity # increment vert velocity
             if self._surfaces_collided['top']: #if top collide
-                engine_instance.state =GameOverState(self._level, self._cube, self._startpoint, 1) #end game
+                engine_instance.state =GameOverState(self, 1) #end game
                 
         else:  # Inverted gravity.
             if self._surfaces_collided['top']:  # If colliding with ceiling above (inverted ground).
@@ -197,31 +273,107 @@ class GameState:
                 self.is_on_ground = False #on ground is false
                 self._vertical_velocity += self._gravity #increace vert velocity
             if self._surfaces_collided['bottom']: #if bottom collision
-                engine_instance.state = GameOverState(self._level, self._cube, self._startpoint, 1) #end game
+                engine_instance.state = GameOverState(self, 1) #end game
 
         # Handle game over for collisions with spikes or out-of-bounds.
         if self._surfaces_collided['right'] or self._surfaces_collided['left']: #if left or right collision
-            engine_instance.state = GameOverState(self._level, self._cube, self._startpoint, 1) # end game
+            engine_instance.state = GameOverState(self, 1) # end game
+
+    def _touch_checkpoint(self, obj):
+        """
+        Makes a checkpoint the respawn point the first time it is touched.
+        """
+        startpoint = [obj._base_x - 4, obj._base_y + 1] # This checkpoint's startpoint.
+        if startpoint != self._startpoint: # First touch of this checkpoint.
+            self._startpoint = startpoint  # Update the startpoint.
+            snapshot = self.snapshot() # Respawn here from now on.
+            snapshot.objects_collided = [tile for tile in snapshot.objects_collided if not tile.traits & TRAIT_HAZARD] # but not back onto hazards
+            self._respawn_snapshot = snapshot
+            if log.state.info: # log the checkpoint
+                log.state.log(log.INFO, "checkpoint on level %d at %s", self._level.id, tuple(startpoint))
+
+    def _touch_end(self, obj):
+        """
+        Ends the run in a win.
+        """
+        engine_instance.state = GameOverState(self, 0)  # The user won.
+
+    def _touch_hazard(self, obj):
+        """
+        Ends the run in a loss.
+        """
+        engine_instance.state = GameOverState(self, 1)  # The user lost.
+
+    def _touch_invert_gravity(self, obj):
+        """
+        Flips gravity the first time a gravity inverter is touched.
+        """
+        if obj.activated == False: # deactivated
+            obj.activated = True # activate
+            if self._gravity > 0:  # If gravity is currently normal.
+                self._gravity = -1 #grav is -1
+                self._vertical_velocity = -2  # Small nudge upwards to ensure movement.
+            else:  # If gravity is currently inverted.
+                self._gravity = 1 #grav is 1
+                self._vertical_velocity = 2  # Small nudge downwards to ensure movement.
+            self.is_jumping = True #jumping is true
+            self.is_on_ground = False #jumping is false
+            if log.physics.info: # log the inversion
+                log.physics.log(log.INFO, "gravity inverted to %d", self._gravity)
+
+    def _touch_speed_boost(self, obj):
+        """
+        Moves the cube a second time this frame, doubling its speed.
+        """
+        self._cube.move(self._vertical_velocity, self._gravity, self._level) #move again - doubles speed
+        if log.physics.debug: # log the boost
+            log.physics.log(log.DEBUG, "speed boost")
+
+    def stats(self): # stats for the frame profiler
+        """
+        Returns the level, the column at the left of the screen, and the number of level objects.
+        """
+        return {"level": self._level.id, "column": self._level.column(), "objects": self._level.object_count()} # level section info
 
     def draw(self): #func to draw everything
-        self._background_image.blit(self._ctr,self._ctr) # show background
-        self._ctr -= 1 #counter
+        self._background.draw(self._level._camera.offset_x) # show the visible part of the background
         #self._instructions_image.blit(10, 10)  # Adjust the x, y position as needed
         self._settings.blit(1500, 10)  # Adjust the x, y position as needed
         self._cube.draw() # draw cube
         self._level.draw() # draw level
 
+MENU_IDLE_TIMEOUT = 1000   # Most milliseconds an idle menu waits for input.
+LOADING_REFRESH = 100      # Milliseconds between loading bar updates on an idle menu.
+MENU_ACTIONS = ("down", "up", "select") # Actions menus respond to.
+
+OPTION_COLOR = (0, 0, 0)             # Color of menu options.
+SELECTED_OPTION_COLOR = (240, 86, 86)  # Color of the hovered menu option.
+
 # Base class for menu states to centralize common functionality.
 class BaseMenuState(State):
     def __init__(self, options, background_path, last_key_time, font_large_size=72, font_small_size=95): # init
-        self.font_large = pygame.font.SysFont(None, font_large_size) # Create a large font.
-        self.font_small = pygame.font.SysFont(None, font_small_size) # Create a snakk font.
+        self.font_large = text_cache.font(font_large_size) # Fetch the shared large font.
+        self.font_small = text_cache.font(font_small_size) # Fetch the shared small font.
+        self._font_small_size = font_small_size # Size the options are rendered at.
         self.options = options # Set the available options.
+        self._rendered_options = None # Copy of the options the option surfaces were rendered for.
+        self._option_surfaces = [] # (normal, highlighted) surface of each option.
+        self._drawn_option = None # Option highlighted when the menu was last drawn.
+        self._drawn_loading = False # Whether the preloading bar was drawn last time.
         self.selected_option = 0 # Set the current selected option.
         self.last_key_time = last_key_time # Record the time of the last key press.
         self.key_delay = 0.2 # Delay required before accepting key presses.
-        self._background_image = pygame.image.load(background_path) # Set the background image.
-        self.select_sound = SoundEffect("assets/click1.ogg") #click sound
+        self._background_image = texture_cache.load(background_path) # Set the background image, shared with the preloader.
+        self.select_sound = sound_bank.effect("assets/click1.ogg") # shared click sound
+
+    def idle_timeout(self):
+        """Returns how long the menu can wait for input: until the key delay ends if a menu key is held, or until the loading bar moves."""
+        if any(engine_instance.keyboard.is_key_down(action) for action in MENU_ACTIONS): # A menu key is held.
+            remaining = self.key_delay - (time.time() - self.last_key_time) # Time left before the key is accepted.
+            return int(remaining * 1000) + 1 if remaining > 0 else None # Wake when it is accepted, or handle it now.
+        if not preloader.done(): # The loading bar is still moving.
+            return LOADING_REFRESH # Wake to redraw it.
+        return MENU_IDLE_TIMEOUT # Nothing to do until a key is pressed.
 
     def update(self):
         """Updates menu state with input handling."""
@@ -238,18 +390,53 @@ class BaseMenuState(State):
         elif engine_instance.keyboard.is_key_down("select"): # If the return key is pressed.
             self.last_key_time = current_time # Record the time of the key press.
             self.select_sound.play() # Play click1 sound on selection
+            option = self.options[self.selected_option] # The option chosen.
             self.select_option() # Select the option.
+            if log.state.info: # log the menu transition
+                log.state.log(log.INFO, "%s: %r -> %s", type(self).__name__, option, type(engine_instance.state).__name__)
+
+    def option_surfaces(self):
+        """Returns the (normal, highlighted) surface of each option, rendering them again only if the options changed."""
+        if self.options != self._rendered_options: # The options changed since they were rendered.
+            self._option_surfaces = [(text_cache.render(option, self._font_small_size, OPTION_COLOR), # Render the option as a button.
+                                      text_cache.render(option, self._font_small_size, SELECTED_OPTION_COLOR)) # And as a hovered button.
+                                     for option in self.options]
+            self._rendered_options = list(self.options) # Remember what was rendered.
+        return self._option_surfaces # The rendered options.
+
+    def option_rect(self, index):
+        """Returns the screen rect covered by both renderings of an option."""
+        normal, highlighted = self.option_surfaces()[index] # The option's surfaces.
+        return normal.get_rect(topleft=(625, 400 + index * 65)).union(highlighted.get_rect(topleft=(625, 400 + index * 65))) # Where it is drawn.
+
+    def dirty_rects(self):
+        """Returns the rects of the options whose highlight changed and of the loading bar, or None if the options changed."""
+        if self._drawn_option is None or self.options != self._rendered_options: # Never drawn, or the options changed.
+            return None # Redraw everything.
+
+        rects = [] # Rects that changed.
+        if self.selected_option != self._drawn_option: # The highlight moved.
+            rects.append(self.option_rect(self._drawn_option)) # Unhighlight the old option.
+            rects.append(self.option_rect(self.selected_option)) # Highlight the new one.
+        if self._drawn_loading: # The loading bar grew, or needs erasing.
+            rects.append(pygame.Rect(0, SCREEN_HEIGHT - 6, SCREEN_WIDTH, 6)) # The loading bar.
+        return rects # The changed rects.
 
     def draw(self):
         """Draws the menu options with highlight on selected option."""
         engine_instance.screen.fill((0, 0, 0)) # Fill the background screen.
         engine_instance.screen.blit(self._background_image, (0, 0)) # Set the background image.
 
-        for index, option in enumerate(self.options): # Iterate through all possible options.
-            color = (240, 86, 86) if self.selected_option == index else (0, 0, 0) # Change button color if hovered.
-            option_surface = self.font_small.render(option, True, color) # Render the option as a button.
+        for index, (normal, highlighted) in enumerate(self.option_surfaces()): # Iterate through all possible options.
+            option_surface = highlighted if self.selected_option == index else normal # Change button color if hovered.
             engine_instance.screen.blit(option_surface, (625, 400 + index * 65)) # Draw the button.
 
+        self._drawn_loading = not preloader.done() # Whether the loading bar is drawn.
+        if self._drawn_loading: # Assets are still loading in the background.
+            width = int(SCREEN_WIDTH * preloader.progress()) # Width of the progress bar.
+            pygame.draw.rect(engine_instance.screen, (240, 86, 86), (0, SCREEN_HEIGHT - 6, width, 6)) # Draw the progress bar.
+        self._drawn_option = self.selected_option # Remember what is highlighted.
+
 # Opening menu state with custom select_option logic.
 class OpeningMenuState(BaseMenuState):
     def __init__(self, last_key_time): #init
@@ -357,7 +544,8 @@ class MainMenuState(BaseMenuState):
             engine_instance.state = self.previous_state  # Resume the game
         elif self.selected_option == 1: # if 1
             self.select_sound.play() # Play click1 sound on selection
-            engine_instance.state = GameState(self.previous_state._level.id)  # Restart the game
+            self.previous_state.restart()  # Restart the game in place
+            engine_instance.state = self.previous_state
         elif self.selected_option == 2: # if 1
             self.select_sound.play() # Play click1 sound on selection
             engine_instance.state = HelpMenuState(self.last_key_time)  # Restart the game
@@ -378,17 +566,20 @@ class HelpMenuState(BaseMenuState): #help menu state
 
 
 class GameOverState(BaseMenuState): # game over menu
-    def __init__(self, level, cube, startpoint, endstate, last_key_time=None): # init
+    def __init__(self, game, endstate, last_key_time=None): # init
         options = ["Continue", "Restart", "Main Menu"] # options list
         if last_key_time is None: # if no key
             last_key_time = time.time()  # Use current time if not provided
         super().__init__(options, "assets/mainMenuBackground.png", last_key_time) # super with info
         
         # Store game-specific references
-        self._level = level # store level
-        self._cube = cube # store cube
-        self._startpoint = startpoint # store start
+        self._game = game # store the finished game
+        self._level = game._level # store level
         self._endstate = endstate # store end state
+        if log.state.info: # log the outcome
+            log.state.log(log.INFO, "game over on level %d: %s", self._level.id, "won" if endstate == 0 else "lost")
+        if endstate == 1: # the user lost
+            log.dump(f"death on level {self._level.id}") # write out what led up to it
 
     def select_option(self): #func to select options
         """Defines actions based on the selected option in the Game Over menu."""
@@ -396,15 +587,17 @@ class GameOverState(BaseMenuState): # game over menu
             if (self._level.id + 1 in levels) and (self._endstate == 0):  # If next level is available and endstate is 0
                 self.select_sound.play() # Play click1 sound on selection
                 engine_instance.state = GameState(self._level.id + 1)  # Continue to the next level
-            elif self._endstate == 1:  # Retry the level from the startpoint
+            elif self._endstate == 1:  # Retry the level from the last checkpoint
                 self.select_sound.play() # Play click1 sound on selection
-                engine_instance.state = GameState(self._level.id, self._startpoint)
+                self._game.respawn() # Restore the checkpoint snapshot in place
+                engine_instance.state = self._game
             else:  # Otherwise, return to main menu
                 self.select_sound.play() # Play click1 sound on selection
                 engine_instance.state = OpeningMenuState(self.last_key_time)
         elif  self.selected_option == 1:  # Restart
             self.select_sound.play() # Play click1 sound on selection
-            engine_instance.state = GameState(self._level.id)  # Restart the current level
+            self._game.restart()  # Restart the current level in place
+            engine_instance.state = self._game
         elif self.selected_option == 2:  # Quit
             self.select_sound.play() # Play click1 sound on selection
             engine_instance.state = OpeningMenuState(self.last_key_time)  # Return to the main menu
@@ -0,0 +1,76 @@
+"""
+text_cache.py
+Description:
+    Shares one font per size and the rendered surface of every (text, size, color) combination, so menus
+    blit pre-rendered text instead of rasterizing it every frame.
+Created:
+    Oct 17, 2026
+Preconditions:
+    The Pygame font module is initialized.
+Postconditions:
+    Each font size is created at most once, and each piece of text is rendered at most once per size and color.
+Error Conditions:
+    None.
+Side Effects:
+    Rendered surfaces stay resident in text_cache for the life of the process.
+Invariants:
+    Surfaces handed out by text_cache are shared and must not be drawn on.
+Known Faults:
+    None.
+"""
+
+import pygame
+
+
+class TextCache:
+    """
+    TextCache creates each font size once and renders each piece of text once.
+    """
+    def __init__(self):
+        """
+        Initializes an empty TextCache.
+        """
+        self._fonts = {}     # Map of size to the default font at that size.
+        self._surfaces = {}  # Map of (text, size, color) to its rendered surface.
+
+        # Track how well the cache is doing.
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        """
+        Returns the shared default font at size.
+        """
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.SysFont(None, size)
+        return font
+
+    def render(self, text, size, color):
+        """
+        Returns the shared antialiased surface of text in the default font at size, in color.
+        """
+        key = (text, size, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._surfaces[key] = self.font(size).render(text, True, color)
+        return surface
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        return {
+            "fonts": len(self._fonts),
+            "entries": len(self._surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Global TextCache instance.
+text_cache = TextCache()